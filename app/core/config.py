@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +6,66 @@ class Settings(BaseSettings):
     jwt_secret_key: str
     secret_key: str
 
+    # ชุดค่าตั้งของ SQLite engine (ดู app/database.py ENGINE_PROFILES)
+    db_profile: Literal["development", "production"] = "development"
+    # None = ใช้ค่าจาก profile (ปิดเป็นค่าเริ่มต้น)
+    db_echo: Optional[bool] = None
+    # แยก engine อ่าน (mode=ro, หลาย connection) กับเขียน (connection เดียว)
+    # ควรใช้คู่กับ WAL (DB_PROFILE=production)
+    db_read_write_split: bool = False
+
+    # cache ผู้ใช้ที่ยืนยันตัวตนแล้ว (key = sub ใน token), 0 = ปิด
+    auth_cache_size: int = 1024
+    auth_cache_ttl: float = 60.0
+
+    # token แบบ claims (uid, exp, iat, token_version) ไม่ต้อง query ผู้ใช้ทุก request
+    auth_stateless: bool = False
+    access_token_expire_minutes: int = 60
+    token_version_cache_size: int = 4096
+    token_version_cache_ttl: float = 30.0
+
+    # keyset pagination (?after=&limit=)
+    page_size_default: int = 50
+    page_size_max: int = 200
+
+    # อายุของ snapshot จังหวัดในหน่วยความจำ (วินาที), 0 = ไม่โหลดใหม่เอง
+    province_catalog_refresh_seconds: float = 300.0
+
+    # Cache-Control max-age ของ endpoint ที่รองรับ ETag, 0 = ต้อง revalidate ทุกครั้ง
+    http_cache_max_age: int = 0
+
+    # import แบบ streaming: จำนวนแถวต่อ transaction และจำนวน error ที่แสดงใน response
+    import_batch_size: int = 500
+    import_max_errors: int = 100
+
+    # จำนวนแถวที่ดึงจาก DB ต่อรอบตอน export แบบ streaming
+    export_chunk_size: int = 1000
+
+    # bcrypt: cost factor, จำนวน thread และจำนวนงาน hash ที่รันพร้อมกันได้
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_concurrency: int = 8
+
+    # group commit ของ POST /profile/selections/ (ปิดเป็นค่าเริ่มต้น)
+    selection_group_commit: bool = False
+    selection_group_commit_window_ms: float = 5.0
+    selection_group_commit_max_batch: int = 100
+
+    # คำนวณ Province.selection_count ใหม่จาก ProvinceTarget ทุก N วินาที, 0 = ปิด
+    popularity_reconcile_seconds: float = 0.0
+
+    # ตัวคูณสิทธิลดหย่อนตามประเภทจังหวัด (เมืองรองได้สิทธิมากกว่า)
+    deduction_primary_multiplier: float = 1.0
+    deduction_secondary_multiplier: float = 1.5
+
+    # นับ query/เวลา SQL ต่อ request (header Server-Timing + log "app.request")
+    # request ที่ query เกิน threshold จะ log เป็น WARNING, 0 = ไม่แจ้งเตือน
+    request_instrumentation: bool = True
+    request_query_threshold: int = 10
+
+    # endpoint /metrics แบบ Prometheus text format (ปิดเป็นค่าเริ่มต้น)
+    metrics_enabled: bool = False
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
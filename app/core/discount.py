@@ -0,0 +1,24 @@
+# app/core/discount.py
+from decimal import Decimal, InvalidOperation
+
+# ส่วนลดเก็บใน DB เป็น basis points (1% = 100bp) แต่ API ยังใช้รูปแบบ "N%"
+
+def percent_to_bp(value: str) -> int:
+    """'12.5%' -> 1250, รับได้ 0-100% ทศนิยมไม่เกิน 2 ตำแหน่ง"""
+    if not value.endswith("%"):
+        raise ValueError("discount_rate must end with '%' (e.g. '10%')")
+    try:
+        number = Decimal(value[:-1].strip())
+    except InvalidOperation:
+        raise ValueError("discount_rate must be a number followed by '%' (e.g. '10%')")
+    bp = number * 100
+    if bp != bp.to_integral_value() or not 0 <= bp <= 10000:
+        raise ValueError("discount_rate must be between 0% and 100% with at most 2 decimals")
+    return int(bp)
+
+def bp_to_percent(bp: int) -> str:
+    """1250 -> '12.5%', 1000 -> '10%'"""
+    whole, frac = divmod(bp, 100)
+    if not frac:
+        return f"{whole}%"
+    return f"{whole}.{frac:02d}".rstrip("0") + "%"
@@ -0,0 +1,36 @@
+# app/core/http_cache.py
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """เทียบ If-None-Match แบบ weak comparison ตาม RFC 9110"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    ตั้ง ETag / Cache-Control ให้ response
+    และคืน 304 Not Modified ถ้า client มีข้อมูลล่าสุดอยู่แล้ว
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.http_cache_max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,108 @@
+# app/core/instrumentation.py
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.request")
+
+
+@dataclass
+class RequestStats:
+    """สถิติ SQL ของ request ปัจจุบัน สะสมโดย event hook ของ engine"""
+    queries: int = 0
+    sql_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+
+# มีค่าเฉพาะระหว่างที่ RequestStatsMiddleware กำลังจัดการ request
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - context._query_started
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """ลงทะเบียน hook นับ query/เวลา SQL ของ engine (เรียกซ้ำได้)"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RequestStatsMiddleware:
+    """
+    ASGI middleware: นับ query และเวลา SQL ต่อ request แล้ว
+    - ใส่ header `Server-Timing: db;dur=..;desc="N queries", app;dur=..`
+      (นับถึงตอนเริ่มส่ง response, query ของ streaming response หลังจากนั้นไม่รวม)
+    - เขียน log แบบ JSON หนึ่งบรรทัดหลังส่ง response เสร็จ
+      ถ้าเกิน settings.request_query_threshold query จะ log เป็น WARNING
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - stats.started
+                timing = (
+                    f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.queries} queries", '
+                    f"app;dur={elapsed * 1000:.2f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._log(scope, status_code, stats)
+
+    @staticmethod
+    def _log(scope, status_code: int, stats: RequestStats) -> None:
+        threshold = settings.request_query_threshold
+        too_many = 0 < threshold < stats.queries
+        level = logging.WARNING if too_many else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        route = scope.get("route")
+        logger.log(level, json.dumps({
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status_code,
+            "queries": stats.queries,
+            "sql_ms": round(stats.sql_seconds * 1000, 2),
+            "total_ms": round((time.perf_counter() - stats.started) * 1000, 2),
+            "too_many_queries": too_many,
+        }, ensure_ascii=False))
@@ -0,0 +1,178 @@
+# app/core/metrics.py
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# วินาที (ค่าเดียวกับ default ของ prometheus_client)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    histogram แบบ Prometheus เก็บจำนวนต่อ bucket (ไม่สะสม) แล้วค่อยสะสมตอน render
+    observe() เป็นแค่ bisect + บวกเลข ไม่มี lock: ทุก request รันใน event loop เดียว
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [count ต่อ bucket ..., count ของ +Inf, sum]
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {series[-1]}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.requests: Dict[Labels, int] = defaultdict(int)
+        self.in_flight: Dict[Labels, int] = defaultdict(int)
+        self.latency = Histogram()
+        self.pool_wait = Histogram((0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+        # ชื่อ -> object ที่มี attribute hits/misses (TTLCache, ProvinceCatalog)
+        self.caches: Dict[str, Any] = {}
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        lines += [
+            "# HELP http_requests_total Requests by method, route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        lines += [f"http_requests_total{_labels(k)} {v}" for k, v in self.requests.items()]
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency by method and route template.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        lines += self.latency.render("http_request_duration_seconds")
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        lines += [f"http_requests_in_flight{_labels(k)} {v}" for k, v in self.in_flight.items()]
+
+        lines += [
+            "# HELP db_pool_checkout_wait_seconds Time spent waiting for a pooled connection.",
+            "# TYPE db_pool_checkout_wait_seconds histogram",
+        ]
+        lines += self.pool_wait.render("db_pool_checkout_wait_seconds")
+
+        hits = ["# TYPE cache_hits_total counter"]
+        misses = ["# TYPE cache_misses_total counter"]
+        ratio = ["# TYPE cache_hit_ratio gauge"]
+        for name, cache in self.caches.items():
+            label = _labels((("cache", name),))
+            total = cache.hits + cache.misses
+            hits.append(f"cache_hits_total{label} {cache.hits}")
+            misses.append(f"cache_misses_total{label} {cache.misses}")
+            ratio.append(f"cache_hit_ratio{label} {cache.hits / total if total else 0.0}")
+        lines += hits + misses + ratio
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """pool ที่จับเวลารอ connection (SQLAlchemy ไม่มี event ก่อน checkout)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.pool_wait.observe((), time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware บันทึกจำนวน request, status และ latency ต่อ route template
+    (เช่น /v1/provinces/{province_id}) path ที่ไม่ตรง route ใดรวมเป็น "<unmatched>"
+    เพื่อไม่ให้จำนวน series โตตาม URL ที่ถูกเรียก
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        # route template รู้หลัง routing เท่านั้น จึงนับ in-flight ตาม method
+        in_flight = (("method", scope["method"]),)
+        registry.in_flight[in_flight] += 1
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            registry.in_flight[in_flight] -= 1
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            labels = (("method", scope["method"]), ("route", route))
+            registry.requests[labels + (("status", str(status_code)),)] += 1
+            registry.latency.observe(labels, time.perf_counter() - started)
+
+
+def install_metrics(
+    app: FastAPI,
+    caches: Optional[Mapping[str, Any]] = None,
+    path: str = "/metrics",
+    registry: MetricsRegistry = metrics,
+) -> None:
+    """เพิ่ม middleware และ endpoint แบบ Prometheus text format ให้ app"""
+    registry.caches.update(caches or {})
+
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(
+            registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    app.add_route(path, metrics_endpoint, include_in_schema=False)
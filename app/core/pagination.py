@@ -0,0 +1,73 @@
+# app/core/pagination.py
+from bisect import bisect_right
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from fastapi import Query, Request, Response
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class CursorPage:
+    """
+    Keyset pagination แบบ `id > :after` ใช้เป็น dependency
+
+    ถ้าไม่ส่งทั้ง after และ limit จะคืนทุกแถวเหมือนเดิม (compat mode)
+    ไม่อย่างนั้น limit จะถูกจำกัดไม่เกิน settings.page_size_max
+    และถ้ายังมีหน้าถัดไปจะตั้ง header `Link: <...>; rel="next"` กับ `X-Next-Cursor`
+    """
+
+    def __init__(
+        self,
+        after: Optional[int] = Query(None, ge=0, description="คืนเฉพาะแถวที่ id > after"),
+        limit: Optional[int] = Query(None, ge=1, description="จำนวนแถวต่อหน้า"),
+    ) -> None:
+        self.after = after
+        self.limit: Optional[int] = None
+        if after is not None or limit is not None:
+            self.limit = min(limit or settings.page_size_default, settings.page_size_max)
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit is not None
+
+    def apply(self, stmt: Any, id_column: Any) -> Any:
+        if self.after is not None:
+            stmt = stmt.where(id_column > self.after)
+        stmt = stmt.order_by(id_column)
+        if self.enabled:
+            # ขอเกินมา 1 แถว เพื่อรู้ว่ามีหน้าถัดไปหรือไม่
+            stmt = stmt.limit(self.limit + 1)
+        return stmt
+
+    def slice(
+        self,
+        items: Sequence[T],
+        key: Callable[[T], int] = lambda row: row.id,
+    ) -> Sequence[T]:
+        """เหมือน apply() แต่ใช้กับข้อมูลในหน่วยความจำที่เรียงตาม id แล้ว"""
+        start = 0
+        if self.after is not None:
+            start = bisect_right(items, self.after, key=key)
+        if not self.enabled:
+            return items[start:]
+        return items[start : start + self.limit + 1]
+
+    def finish(
+        self,
+        rows: Sequence[T],
+        request: Request,
+        response: Response,
+        key: Callable[[T], int] = lambda row: row.id,
+    ) -> List[T]:
+        rows = list(rows)
+        if not self.enabled or len(rows) <= self.limit:
+            return rows
+
+        rows = rows[: self.limit]
+        cursor = key(rows[-1])
+        next_url = request.url.include_query_params(after=cursor, limit=self.limit)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-Cursor"] = str(cursor)
+        return rows
@@ -1,35 +1,122 @@
 # app/core/security.py
 
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from typing import Optional
+from typing import Optional, Tuple
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.database import get_session
+from app.database import get_read_session
 from app.models.user_model import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/v1/authentication/login")
 
+# username -> User ที่โหลดแล้ว เพื่อไม่ต้อง query DB ทุก request
+# ต้อง invalidate เองเมื่อแก้ไข/ลบผู้ใช้ (ดู invalidate_user)
+user_cache: TTLCache[User] = TTLCache(
+    maxsize=settings.auth_cache_size,
+    ttl=settings.auth_cache_ttl,
+)
+
+# user_id -> (token_version, username) ปัจจุบัน ใช้ตรวจ token แบบ stateless
+# ต้องเก็บ username ด้วย เพราะ SQLite ให้ id ของผู้ใช้ที่ถูกลบกับผู้ใช้ใหม่ได้
+token_versions: TTLCache[Tuple[int, str]] = TTLCache(
+    maxsize=settings.token_version_cache_size,
+    ttl=settings.token_version_cache_ttl,
+)
+
+@dataclass(frozen=True)
+class Principal:
+    """ผู้ใช้ที่ยืนยันตัวตนแล้ว แบบเบา (ไม่ต้องโหลด User จาก DB)"""
+    id: int
+    username: str
+
+def invalidate_user(user_id: int) -> None:
+    """ลบผู้ใช้ออกจาก cache ตาม id (ไม่ต้องรู้ username เดิม)"""
+    user_cache.discard_if(lambda user: user.id == user_id)
+
+def remember_token_version(user_id: int, user: Optional[User]) -> None:
+    """อัปเดต version map หลัง commit; user=None คือผู้ใช้ถูกลบ"""
+    if user is None:
+        token_versions.pop(user_id)
+    else:
+        token_versions.set(user_id, (user.token_version, user.username))
+
 def create_access_token(data: dict) -> str:
     return jwt.encode(data, settings.jwt_secret_key, algorithm="HS256")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_session),
-) -> User:
+def create_user_token(user: User) -> str:
+    if not settings.auth_stateless:
+        return create_access_token({"sub": user.username})
+
+    now = datetime.now(timezone.utc)
+    return create_access_token({
+        "sub": user.username,
+        "uid": user.id,
+        "token_version": user.token_version,
+        "iat": now,
+        "exp": now + timedelta(minutes=settings.access_token_expire_minutes),
+    })
+
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
-        username: Optional[str] = payload.get("sub")
-        if not username:
+        if not payload.get("sub"):
             raise
     except:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid token")
+    return payload
 
-    result = await session.exec(select(User).where(User.username == username))
-    user = result.first()
-    if not user:
-        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_read_session),
+) -> User:
+    payload = _decode(token)
+    username: str = payload["sub"]
+
+    user = user_cache.get(username)
+    if user is None:
+        result = await session.exec(select(User).where(User.username == username))
+        user = result.first()
+        if not user:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
+        user_cache.set(username, user)
+
+    if "token_version" in payload and payload["token_version"] != user.token_version:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token revoked")
     return user
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_read_session),
+) -> Principal:
+    """
+    สำหรับ route ที่ต้องการแค่ id/username ของผู้ใช้
+    ถ้าเปิด auth_stateless และ token มี uid จะตรวจแค่ token_version และ username
+    (จาก cache) โดยไม่โหลด User, นอกนั้นใช้ get_current_user ตามเดิม
+    """
+    payload = _decode(token)
+    uid = payload.get("uid")
+    if not settings.auth_stateless or uid is None:
+        user = await get_current_user(token, session)
+        return Principal(id=user.id, username=user.username)
+
+    current = token_versions.get(uid)
+    if current is None:
+        result = await session.exec(select(User.token_version, User.username).where(User.id == uid))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User not found")
+        current = tuple(row)
+        token_versions.set(uid, current)
+
+    version, username = current
+    # id เดียวกันอาจเป็นผู้ใช้คนใหม่แล้ว (ผู้ใช้เดิมถูกลบ) token ต้องเป็นของคนที่ออกให้เท่านั้น
+    if payload.get("token_version") != version or payload["sub"] != username:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Token revoked")
+    return Principal(id=uid, username=payload["sub"])
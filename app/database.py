@@ -1,21 +1,124 @@
 # app/database.py
-from typing import AsyncGenerator
+from dataclasses import dataclass, replace
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.metrics import TimedQueuePool
 
 # ต้องขึ้นต้นด้วย sqlite+aiosqlite://
 DATABASE_URL = settings.database_url
 
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """ค่าตั้งของ engine + PRAGMA ที่ตั้งทุกครั้งที่เปิด connection (None = ใช้ค่า default ของ SQLite)"""
+    echo: bool = False
+    journal_mode: Optional[str] = None
+    synchronous: Optional[str] = None
+    busy_timeout_ms: Optional[int] = None
+    mmap_size: Optional[int] = None
+    cache_size_kib: Optional[int] = None
+    pool_size: int = 5
+    max_overflow: int = 10
+
+
+# เลือกด้วย env var DB_PROFILE
+ENGINE_PROFILES = {
+    "development": EngineProfile(
+        busy_timeout_ms=5000,
+    ),
+    "production": EngineProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        busy_timeout_ms=5000,
+        mmap_size=256 * 1024 * 1024,
+        cache_size_kib=64 * 1024,
+        pool_size=10,
+        max_overflow=20,
+    ),
+}
+
+
+def _pragmas(profile: EngineProfile) -> list[str]:
+    pragmas = []
+    if profile.journal_mode:
+        pragmas.append(f"PRAGMA journal_mode={profile.journal_mode}")
+    if profile.synchronous:
+        pragmas.append(f"PRAGMA synchronous={profile.synchronous}")
+    if profile.busy_timeout_ms is not None:
+        pragmas.append(f"PRAGMA busy_timeout={int(profile.busy_timeout_ms)}")
+    if profile.mmap_size is not None:
+        pragmas.append(f"PRAGMA mmap_size={int(profile.mmap_size)}")
+    if profile.cache_size_kib is not None:
+        # ค่าติดลบคือหน่วย KiB
+        pragmas.append(f"PRAGMA cache_size=-{int(profile.cache_size_kib)}")
+    return pragmas
+
+
+def create_engine_for_profile(url: str, profile: EngineProfile, **kwargs) -> AsyncEngine:
+    echo = profile.echo if settings.db_echo is None else settings.db_echo
+    database = make_url(url).database
+    if database not in (None, "", ":memory:"):
+        # :memory: ใช้ StaticPool ซึ่งไม่รับค่าขนาด pool
+        kwargs.setdefault("pool_size", profile.pool_size)
+        kwargs.setdefault("max_overflow", profile.max_overflow)
+        if settings.metrics_enabled:
+            kwargs.setdefault("poolclass", TimedQueuePool)
+
+    new_engine = create_async_engine(url, echo=echo, future=True, **kwargs)
+
+    pragmas = _pragmas(profile)
+
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    if settings.request_instrumentation:
+        instrument_engine(new_engine)
+    return new_engine
+
+
+def read_only_url(url: str) -> str:
+    """แปลง URL ของไฟล์ SQLite ให้เปิดแบบอ่านอย่างเดียว (file:...?mode=ro&uri=true)"""
+    parsed = make_url(url)
+    return parsed.set(
+        database=f"file:{parsed.database}",
+        query={**parsed.query, "mode": "ro", "uri": "true"},
+    ).render_as_string(hide_password=False)
+
+
+engine_profile = ENGINE_PROFILES[settings.db_profile]
+_split = settings.db_read_write_split and make_url(DATABASE_URL).database not in (None, "", ":memory:")
+
 # สร้าง async engine
-engine = create_async_engine(
+# เมื่อแยก read/write: engine นี้เป็นตัวเขียน มี connection เดียว
+# เพื่อให้การเขียนต่อคิวกันใน pool แทนที่จะไปชน lock ของ SQLite
+engine = create_engine_for_profile(
     DATABASE_URL,
-    echo=True,
-    future=True,
+    engine_profile,
+    **({"pool_size": 1, "max_overflow": 0} if _split else {}),
+)
+
+# engine สำหรับอ่านอย่างเดียว (mode=ro) ใช้กับ GET handler
+# ใน WAL mode อ่านพร้อมกันได้หลาย connection โดยไม่ต้องรอตัวเขียน
+read_engine = (
+    create_engine_for_profile(
+        read_only_url(DATABASE_URL),
+        replace(engine_profile, journal_mode=None),
+    )
+    if _split
+    else engine
 )
 
 # sessionmaker ที่คืน AsyncSession ของ SQLModel
@@ -25,7 +128,21 @@ async_session = sessionmaker(
     expire_on_commit=False,
 )
 
+async_read_session = sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # dependency
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_write_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_read_session() as session:
+        yield session
+
+def get_read_session_factory() -> sessionmaker:
+    """สำหรับงานที่ทำต่อหลัง handler คืนค่าแล้ว (เช่น streaming response) ซึ่งต้องเปิด session เอง"""
+    return async_read_session
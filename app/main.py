@@ -1,14 +1,35 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import app.models as models
+from app.core.config import settings
+from app.core.instrumentation import RequestStatsMiddleware
+from app.core.metrics import install_metrics
+from app.core.security import token_versions, user_cache
+from app.database import async_session
 from app.routers import router
+from app.services.popularity import start_reconcile_job
+from app.services.province_catalog import province_catalog
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: สร้างตารางก่อน
     await models.init_db()
+    # โหลดข้อมูลจังหวัดเข้าหน่วยความจำ
+    async with async_session() as session:
+        await province_catalog.load(session)
+    reconcile_job = start_reconcile_job()
     yield
-    # Shutdown: (ถ้ามี cleanup)
+    # Shutdown: หยุดงานเบื้องหลัง
+    if reconcile_job is not None:
+        reconcile_job.cancel()
 
 app = FastAPI(lifespan=lifespan)
+if settings.request_instrumentation:
+    app.add_middleware(RequestStatsMiddleware)
+if settings.metrics_enabled:
+    install_metrics(app, caches={
+        "auth_user": user_cache,
+        "token_version": token_versions,
+        "province_catalog": province_catalog,
+    })
 app.include_router(router)
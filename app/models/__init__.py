@@ -1,10 +1,13 @@
 from sqlmodel import SQLModel
 from app.database import engine
+from app.models.schema_upgrade import upgrade_schema
 
 async def init_db() -> None:
     """
     สร้างทุกตารางในฐานข้อมูล จาก SQLModel.metadata
+    แล้วเพิ่มคอลัมน์/index ที่ฐานข้อมูลรุ่นก่อนยังไม่มี (ดู upgrade_schema)
     เรียกก่อนแอป FastAPI start ขึ้น
     """
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
@@ -1,13 +1,40 @@
+from datetime import datetime
 from typing import Optional, List
-from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, func
+from sqlmodel import SQLModel, Field, Relationship, select
+from app.core.discount import bp_to_percent
 from app.models.province_target_model import ProvinceTarget
 
 class Province(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_province_category_discount_bp", "category", "discount_bp"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     category: str
-    discount_rate: str = Field(default="0%")
+    # ส่วนลดเป็น basis points (10% = 1000) เพื่อให้ filter/sort ใน SQL ได้
+    discount_bp: int = Field(default=0)
     is_primary: bool = Field(default=False)
     is_secondary: bool = Field(default=False)
+    # change version เพิ่มขึ้นทุกครั้งที่เพิ่ม/แก้ไข/ลบ ใช้กับ delta sync
+    version: int = Field(default=0, index=True)
+    # tombstone: ลบแบบ soft delete เพื่อให้ client sync การลบได้
+    deleted_at: Optional[datetime] = Field(default=None)
+    # จำนวนผู้ใช้ที่เลือกจังหวัดนี้ อัปเดตใน transaction เดียวกับ selection
+    # ไม่เพิ่ม version (ไม่ใช่การแก้ไขข้อมูลจังหวัด)
+    selection_count: int = Field(default=0, index=True)
 
     targets: List["ProvinceTarget"] = Relationship(back_populates="province")
+
+    @property
+    def discount_rate(self) -> str:
+        return bp_to_percent(self.discount_bp)
+
+def next_province_version():
+    """
+    SQL expression ของ version ถัดไป ใช้กำหนดค่าใน INSERT/UPDATE
+    ประเมินภายใน statement เดียวกับการเขียน จึงไม่ชนกันระหว่าง writer
+    """
+    p = Province.__table__.alias("prev")
+    return select(func.coalesce(func.max(p.c.version), 0) + 1).scalar_subquery()
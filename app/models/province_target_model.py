@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
+from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -9,6 +10,11 @@ if TYPE_CHECKING:
     from .province_model import Province
 
 class ProvinceTarget(SQLModel, table=True):
+    # ผู้ใช้หนึ่งคนเลือกจังหวัดเดียวกันได้ครั้งเดียว
+    __table_args__ = (
+        UniqueConstraint("user_id", "province_id", name="uq_provincetarget_user_province"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     province_id: int = Field(foreign_key="province.id", index=True)
@@ -0,0 +1,113 @@
+# app/models/schema_upgrade.py
+import logging
+from typing import List
+
+from sqlalchemy import Connection, UniqueConstraint, inspect, text
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+from app.core.discount import percent_to_bp
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(conn: Connection, steps: List[str]) -> None:
+    """
+    ALTER TABLE ADD COLUMN สำหรับคอลัมน์ใน model ที่ตารางเดิมยังไม่มี
+    SQLite ต้องมี DEFAULT เมื่อเพิ่มคอลัมน์ NOT NULL จึงใช้ค่า default ของ model
+    """
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = str(CreateColumn(column).compile(dialect=conn.dialect))
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                ddl += f" DEFAULT {int(default) if isinstance(default, bool) else default!r}"
+            elif not column.nullable:
+                raise RuntimeError(f"cannot add NOT NULL column {table.name}.{column.name} without a default")
+            conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}'))
+            steps.append(f"add column {table.name}.{column.name}")
+
+
+def _migrate_discount_rate(conn: Connection, steps: List[str]) -> None:
+    """แปลง province.discount_rate ("12.5%") แบบเดิมเป็น discount_bp แล้วลบคอลัมน์เดิม"""
+    columns = {c["name"] for c in inspect(conn).get_columns("province")}
+    if "discount_rate" not in columns:
+        return
+    rows = conn.execute(text("SELECT id, discount_rate FROM province")).all()
+    params = []
+    for pid, rate in rows:
+        try:
+            params.append({"id": pid, "bp": percent_to_bp(rate or "0%")})
+        except ValueError:
+            logger.warning("province %s: invalid discount_rate %r, using 0%%", pid, rate)
+            params.append({"id": pid, "bp": 0})
+    if params:
+        conn.execute(text("UPDATE province SET discount_bp = :bp WHERE id = :id"), params)
+    # คอลัมน์เดิมเป็น NOT NULL ไม่มี DEFAULT ถ้าเก็บไว้ INSERT ใหม่จะล้ม (ต้องใช้ SQLite >= 3.35)
+    conn.execute(text('ALTER TABLE province DROP COLUMN discount_rate'))
+    steps.append(f"convert province.discount_rate to discount_bp ({len(params)} rows)")
+
+
+def _create_missing_indexes(conn: Connection, steps: List[str]) -> None:
+    """
+    create_all ไม่สร้าง index ให้ตารางที่มีอยู่แล้ว จึงสร้างเองที่นี่
+    unique constraint ที่เพิ่มทีหลังใช้ unique index ชื่อเดียวกันแทน (SQLite เพิ่ม constraint ภายหลังไม่ได้)
+    """
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        existing |= {c["name"] for c in inspector.get_unique_constraints(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                steps.append(f"create index {index.name}")
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or constraint.name in existing:
+                continue
+            cols = ", ".join(f'"{c.name}"' for c in constraint.columns)
+            # เก็บแถวแรกของกลุ่มที่ซ้ำ มิฉะนั้นสร้าง unique index ไม่ได้
+            removed = conn.execute(text(
+                f'DELETE FROM "{table.name}" WHERE id NOT IN '
+                f'(SELECT min(id) FROM "{table.name}" GROUP BY {cols})'
+            )).rowcount
+            if removed:
+                steps.append(f"remove {removed} duplicate rows from {table.name}")
+            conn.execute(text(f'CREATE UNIQUE INDEX "{constraint.name}" ON "{table.name}" ({cols})'))
+            steps.append(f"create unique index {constraint.name}")
+
+
+def upgrade_schema(conn: Connection) -> List[str]:
+    """
+    ปรับฐานข้อมูลที่สร้างจาก schema รุ่นก่อนให้ตรงกับ model ปัจจุบัน
+    (โปรเจกต์ไม่มี migration tool) เรียกหลัง create_all ใน transaction เดียวกัน
+    ทำซ้ำได้: ฐานข้อมูลที่เป็นปัจจุบันแล้วจะไม่ถูกแก้ คืนรายการสิ่งที่ทำ
+    """
+    steps: List[str] = []
+    columns = {c["name"] for c in inspect(conn).get_columns("province")}
+    new_version = "version" not in columns
+    new_count = "selection_count" not in columns
+
+    _add_missing_columns(conn, steps)
+    _migrate_discount_rate(conn, steps)
+    if new_version:
+        # แถวเดิมต้องมี version > 0 เพื่อให้ /provinces/changes?since=0 เห็น
+        conn.execute(text("UPDATE province SET version = 1"))
+    _create_missing_indexes(conn, steps)
+    if new_count:
+        # หลัง _create_missing_indexes ซึ่งลบ selection ที่ซ้ำออกแล้ว
+        conn.execute(text(
+            "UPDATE province SET selection_count ="
+            " (SELECT count(*) FROM provincetarget WHERE provincetarget.province_id = province.id)"
+        ))
+
+    for step in steps:
+        logger.info("schema upgrade: %s", step)
+    return steps
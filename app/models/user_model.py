@@ -11,5 +11,7 @@ class User(SQLModel, table=True):
     email: Optional[str] = Field(default=None, index=True, unique=True)
     citizen_id: Optional[str] = Field(default=None, index=True, unique=True)
     hashed_password: str
+    # เพิ่มทุกครั้งที่เปลี่ยนรหัสผ่าน เพื่อยกเลิก token เก่า
+    token_version: int = Field(default=0)
 
     targets: List[ProvinceTarget] = Relationship(back_populates="user")
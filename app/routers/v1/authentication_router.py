@@ -1,13 +1,16 @@
 # app/routers/v1/authentication_router.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.models.user_model import User
 from app.schemas.user_schema import UserCreate, UserRead, Token
-from app.core.security import create_access_token
+from app.core.security import create_user_token
+from app.services.passwords import verify_password
+from app.services.registration import register_user
 
 router = APIRouter(
     prefix="/authentication",
@@ -21,20 +24,9 @@ router = APIRouter(
 )
 async def register(
     payload: UserCreate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    hashed = payload.password + "_notreallyhashed"
-    user = User(
-        username=payload.username,
-        phone=payload.phone,
-        email=payload.email,
-        citizen_id=payload.citizen_id,
-        hashed_password=hashed,
-    )
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await register_user(session, payload)
 
 @router.post(
     "/login",
@@ -42,16 +34,26 @@ async def register(
 )
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
+    write_session: AsyncSession = Depends(get_write_session),
 ):
     result = await session.exec(
         select(User).where(User.username == form_data.username)
     )
     user = result.first()
-    if not user or (form_data.password + "_notreallyhashed") != user.hashed_password:
+    valid, new_hash = await verify_password(
+        form_data.password, user.hashed_password if user else None
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
-    access_token = create_access_token({"sub": user.username})
+    if new_hash:
+        # อัปเกรด hash แบบเก่า/cost ต่ำ
+        await write_session.exec(
+            update(User).where(User.id == user.id).values(hashed_password=new_hash)
+        )
+        await write_session.commit()
+    access_token = create_user_token(user)
     return Token(access_token=access_token, token_type="bearer")
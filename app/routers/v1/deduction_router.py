@@ -0,0 +1,78 @@
+# app/routers/v1/deduction_router.py
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.exceptions import RequestValidationError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_read_session
+from app.models.province_target_model import ProvinceTarget
+from app.schemas.deduction_schema import DeductionBatchRequest, DeductionSummary
+from app.core.security import get_current_principal, Principal
+from app.services.deductions import summarize
+from app.services.province_catalog import province_catalog
+
+router = APIRouter(
+    prefix="/profile/deductions",
+    tags=["deductions"],
+    dependencies=[Depends(get_current_principal)],
+)
+
+def _parse_spends(
+    spend: List[str] = Query(
+        [], description="ยอดใช้จ่ายรายจังหวัดในรูป province_id:amount ส่งซ้ำได้หลายค่า"
+    ),
+) -> Dict[int, Decimal]:
+    spends: Dict[int, Decimal] = {}
+    for index, item in enumerate(spend):
+        try:
+            province_id, amount = item.split(":", 1)
+            value = Decimal(amount)
+            if not value.is_finite() or value < 0:
+                raise ValueError
+            spends[int(province_id)] = value
+        except (ValueError, InvalidOperation):
+            raise RequestValidationError([{
+                "type": "value_error",
+                "loc": ("query", "spend", index),
+                "msg": "expected province_id:amount with a non-negative amount",
+                "input": item,
+            }])
+    return spends
+
+async def _summaries(
+    session: AsyncSession,
+    user_ids: List[int],
+    amount: Optional[Decimal],
+    spends: Dict[int, Decimal],
+) -> List[DeductionSummary]:
+    # query เฉพาะคอลัมน์ของ selection ครั้งเดียว ส่วนอัตรามาจาก catalog
+    stmt = (
+        select(ProvinceTarget.id, ProvinceTarget.user_id, ProvinceTarget.province_id)
+        .where(ProvinceTarget.user_id.in_(user_ids))
+        .order_by(ProvinceTarget.id)
+    )
+    rows = (await session.exec(stmt)).all()
+    catalog = await province_catalog.snapshot(session)
+    return summarize(rows, catalog.by_id, catalog.deduction_rates, amount, spends, user_ids)
+
+@router.get("/", response_model=DeductionSummary)
+async def my_deductions(
+    amount: Optional[Decimal] = Query(None, ge=0, description="ยอดใช้จ่ายของทุกจังหวัดที่เลือก"),
+    spends: Dict[int, Decimal] = Depends(_parse_spends),
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """สิทธิลดหย่อนของผู้ใช้ปัจจุบัน แยกตาม selection พร้อมยอดรวม"""
+    [summary] = await _summaries(session, [current_user.id], amount, spends)
+    return summary
+
+@router.post("/batch", response_model=List[DeductionSummary])
+async def batch_deductions(
+    data: DeductionBatchRequest,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """คำนวณให้หลายผู้ใช้ในคำขอเดียว (สำหรับงาน reconcile หลังบ้าน)"""
+    user_ids = list(dict.fromkeys(data.user_ids))
+    return await _summaries(session, user_ids, data.amount, data.spends)
@@ -0,0 +1,74 @@
+# app/routers/v1/export_router.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import select
+
+from app.database import get_read_session_factory
+from app.models.province_model import Province
+from app.models.province_target_model import ProvinceTarget
+from app.models.user_model import User
+from app.core.security import get_current_user
+from app.services.bulk_export import ExportFormat, stream_export
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"],
+    dependencies=[Depends(get_current_user)],
+)
+
+# basis points -> "N%" ใน SQL (1250 -> '12.5%') ให้ export ไม่ต้องแปลงทีละแถว
+_discount_rate = func.printf("%g%%", Province.discount_bp / 100.0).label("discount_rate")
+
+@router.get("/users")
+async def export_users(
+    format: ExportFormat = Query(ExportFormat.ndjson),
+    session_factory: sessionmaker = Depends(get_read_session_factory),
+):
+    stmt = select(
+        User.id, User.username, User.phone, User.email, User.citizen_id,
+    ).order_by(User.id)
+    return stream_export(session_factory, stmt, format, "users")
+
+@router.get("/provinces")
+async def export_provinces(
+    format: ExportFormat = Query(ExportFormat.ndjson),
+    session_factory: sessionmaker = Depends(get_read_session_factory),
+):
+    stmt = (
+        select(
+            Province.id,
+            Province.name,
+            Province.category,
+            _discount_rate,
+            Province.discount_bp,
+            Province.is_primary,
+            Province.is_secondary,
+        )
+        .where(Province.deleted_at.is_(None))
+        .order_by(Province.id)
+    )
+    return stream_export(session_factory, stmt, format, "provinces")
+
+@router.get("/selections")
+async def export_selections(
+    format: ExportFormat = Query(ExportFormat.ndjson),
+    session_factory: sessionmaker = Depends(get_read_session_factory),
+):
+    stmt = (
+        select(
+            ProvinceTarget.id,
+            ProvinceTarget.user_id,
+            User.username,
+            ProvinceTarget.province_id,
+            Province.name.label("province_name"),
+            Province.category,
+            _discount_rate,
+            ProvinceTarget.selected_at,
+        )
+        .join(User, User.id == ProvinceTarget.user_id)
+        .join(Province, Province.id == ProvinceTarget.province_id)
+        .where(Province.deleted_at.is_(None))
+        .order_by(ProvinceTarget.id)
+    )
+    return stream_export(session_factory, stmt, format, "selections")
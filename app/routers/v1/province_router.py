@@ -1,17 +1,28 @@
-from typing import List, Union
-from fastapi import APIRouter, Depends, Body, HTTPException, status
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, Body, HTTPException, Query, Request, Response, status
+from sqlalchemy import insert, update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
-from app.models.province_model import Province
+from app.database import get_read_session, get_write_session
+from app.models.province_model import Province, next_province_version
 from app.schemas.province_schema import (
     ProvinceCreate,
+    ProvinceCreatePayload,
     ProvinceRead,
     ProvinceUpdate,
     ProvinceCategory,
+    ProvinceChanges,
+    ProvinceSort,
 )
+from app.schemas.import_schema import ImportSummary
+from app.core.discount import percent_to_bp
+from app.core.http_cache import conditional_response
+from app.core.pagination import CursorPage
 from app.core.security import get_current_user
+from app.services.bulk_import import run_import
+from app.services.province_catalog import province_catalog
 
 router = APIRouter(
     prefix="/provinces",
@@ -19,107 +30,230 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
+async def _insert_provinces(session: AsyncSession, items: List[ProvinceCreate]) -> List[Province]:
+    # INSERT หลายแถวใน statement เดียว ทั้ง batch ได้ version เดียวกัน
+    # SQLite ไม่รับประกันลำดับของ RETURNING แต่ id ถูกแจกเรียงตาม VALUES
+    # ภายใต้ write lock จึงเรียงผลตาม id เพื่อให้ตรงกับลำดับของ items
+    version = next_province_version()
+    rows = [
+        dict(
+            name=data.name,
+            category=data.category.value,
+            discount_bp=percent_to_bp(data.discount_rate),
+            is_primary=data.category == ProvinceCategory.primary,
+            is_secondary=data.category == ProvinceCategory.secondary,
+            version=version,
+        )
+        for data in items
+    ]
+    result = await session.exec(insert(Province).values(rows).returning(Province))
+    return sorted(result.scalars().all(), key=lambda p: p.id)
+
 @router.post(
     "/",
     response_model=Union[ProvinceRead, List[ProvinceRead]],
     status_code=status.HTTP_201_CREATED,
 )
 async def create_province(
-    payload: Union[ProvinceCreate, List[ProvinceCreate]] = Body(...),
-    session: AsyncSession = Depends(get_session),
+    # ใช้ Annotated เพื่อให้ FastAPI คง Discriminator ของ ProvinceCreatePayload ไว้
+    payload: Annotated[
+        ProvinceCreatePayload,
+        Body(description="ProvinceCreate หนึ่งรายการ หรือ list ของ ProvinceCreate"),
+    ],
+    session: AsyncSession = Depends(get_write_session),
 ):
     items = payload if isinstance(payload, list) else [payload]
-    created: List[Province] = []
-
-    for data in items:
-        prov = Province(
-            name=data.name,
-            category=data.category.value,
-            discount_rate=data.discount_rate,
-            is_primary=data.category == ProvinceCategory.primary,
-            is_secondary=data.category == ProvinceCategory.secondary,
-        )
-        session.add(prov)
-        created.append(prov)
+    if not items:
+        return []
 
+    created = await _insert_provinces(session, items)
     await session.commit()
-    for prov in created:
-        await session.refresh(prov)
+    province_catalog.apply_changes(created)
 
     return created if isinstance(payload, list) else created[0]
 
+@router.post("/import", response_model=ImportSummary)
+async def import_provinces(
+    request: Request,
+    session: AsyncSession = Depends(get_write_session),
+):
+    """
+    นำเข้าจังหวัดจาก body แบบ NDJSON (ค่าเริ่มต้น) หรือ CSV (Content-Type: text/csv)
+    อ่านแบบ streaming และ commit ทีละ batch, แถวที่ผิดจะถูกรายงานใน errors
+    """
+    async def insert_batch(batch):
+        created = await _insert_provinces(session, [data for _, data in batch])
+        await session.commit()
+        province_catalog.apply_changes(created)
+        return []
+
+    return await run_import(request, ProvinceCreate, insert_batch)
+
 @router.get("/", response_model=List[ProvinceRead])
-async def list_provinces(session: AsyncSession = Depends(get_session)):
-    result = await session.exec(select(Province))
-    return result.all()
+async def list_provinces(
+    request: Request,
+    response: Response,
+    page: CursorPage = Depends(),
+    category: Optional[ProvinceCategory] = Query(None),
+    min_discount: Optional[float] = Query(None, ge=0, le=100, description="ส่วนลดขั้นต่ำ (%)"),
+    max_discount: Optional[float] = Query(None, ge=0, le=100, description="ส่วนลดสูงสุด (%)"),
+    sort: ProvinceSort = Query(ProvinceSort.id),
+    session: AsyncSession = Depends(get_read_session),
+):
+    filtered = (
+        category is not None
+        or min_discount is not None
+        or max_discount is not None
+        or sort != ProvinceSort.id
+    )
+    if not filtered:
+        snapshot = await province_catalog.snapshot(session)
+        not_modified = conditional_response(request, response, snapshot.etag)
+        if not_modified:
+            return not_modified
+        return page.finish(page.slice(snapshot.items), request, response)
+
+    # filter/sort ใน SQL ใช้ index (category, discount_bp)
+    stmt = select(Province).where(Province.deleted_at.is_(None))
+    if category is not None:
+        stmt = stmt.where(Province.category == category.value)
+    if min_discount is not None:
+        stmt = stmt.where(Province.discount_bp >= round(min_discount * 100))
+    if max_discount is not None:
+        stmt = stmt.where(Province.discount_bp <= round(max_discount * 100))
+
+    if sort == ProvinceSort.id:
+        result = await session.exec(page.apply(stmt, Province.id))
+        return page.finish(result.all(), request, response)
+
+    # cursor เป็น id จึงใช้ after ได้เฉพาะ sort=id, ส่วน limit ใช้ได้เสมอ
+    if page.after is not None:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "after is only supported with sort=id")
+    if sort == ProvinceSort.discount:
+        stmt = stmt.order_by(Province.discount_bp, Province.id)
+    elif sort == ProvinceSort.discount_desc:
+        stmt = stmt.order_by(Province.discount_bp.desc(), Province.id)
+    else:
+        stmt = stmt.order_by(Province.selection_count.desc(), Province.id)
+    if page.enabled:
+        stmt = stmt.limit(page.limit)
+    return (await session.exec(stmt)).all()
+
+@router.get("/changes", response_model=ProvinceChanges)
+async def list_province_changes(
+    since: int = Query(0, ge=0, description="version ล่าสุดที่ client มีอยู่"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    result = await session.exec(
+        select(Province).where(Province.version > since).order_by(Province.version)
+    )
+    changes = result.all()
+
+    return ProvinceChanges(
+        version=max((p.version for p in changes), default=since),
+        upserts=[ProvinceRead.model_validate(p) for p in changes if p.deleted_at is None],
+        deleted=[p.id for p in changes if p.deleted_at is not None],
+    )
+
+@router.get("/popular", response_model=List[ProvinceRead])
+async def popular_provinces(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """จังหวัดที่มีผู้เลือกมากที่สุด N อันดับ (จาก selection_count ใน catalog)"""
+    snapshot = await province_catalog.snapshot(session)
+    not_modified = conditional_response(request, response, snapshot.etag)
+    if not_modified:
+        return not_modified
+    return snapshot.popular[:limit]
+
+@router.get("/search", response_model=List[ProvinceRead])
+async def search_provinces(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="ชื่อจังหวัดบางส่วน (ไทย/อังกฤษ)"),
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """ค้นชื่อจังหวัดจาก index ในหน่วยความจำ เรียงตามความตรงของชื่อ"""
+    snapshot = await province_catalog.snapshot(session)
+    not_modified = conditional_response(request, response, snapshot.etag)
+    if not_modified:
+        return not_modified
+    return snapshot.search_index.search(q, limit)
 
 @router.get("/{province_id}", response_model=ProvinceRead)
 async def read_province(
     province_id: int,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
 ):
-    prov = await session.get(Province, province_id)
+    snapshot = await province_catalog.snapshot(session)
+    prov = snapshot.by_id.get(province_id)
     if not prov:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
+    not_modified = conditional_response(request, response, snapshot.item_etag(prov))
+    if not_modified:
+        return not_modified
     return prov
 
-@router.put("/{province_id}", response_model=ProvinceRead)
-async def replace_province(
+def _province_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """แปลงข้อมูลจาก ProvinceUpdate เป็นค่าคอลัมน์"""
+    values: Dict[str, Any] = {}
+    if "name" in data:
+        values["name"] = data["name"]
+    if "category" in data:
+        values["category"] = data["category"].value
+        values["is_primary"] = data["category"] == ProvinceCategory.primary
+        values["is_secondary"] = data["category"] == ProvinceCategory.secondary
+    if "discount_rate" in data:
+        values["discount_bp"] = percent_to_bp(data["discount_rate"])
+    return values
+
+async def _update_province(
+    session: AsyncSession,
     province_id: int,
-    payload: ProvinceUpdate,
-    session: AsyncSession = Depends(get_session),
-):
-    prov = await session.get(Province, province_id)
+    values: Dict[str, Any],
+) -> Province:
+    # UPDATE ... RETURNING statement เดียว ไม่ต้อง get/refresh และไม่มี read-modify-write race
+    stmt = (
+        update(Province)
+        .where(Province.id == province_id, Province.deleted_at.is_(None))
+        .values(**values, version=next_province_version())
+        .returning(Province)
+    )
+    prov = (await session.exec(stmt)).scalars().first()
     if not prov:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
-
-    data = payload.model_dump(exclude_unset=False)
-    if data.get("name") is not None:
-        prov.name = data["name"]
-    if data.get("category") is not None:
-        prov.category = data["category"].value
-        prov.is_primary = data["category"] == ProvinceCategory.primary
-        prov.is_secondary = data["category"] == ProvinceCategory.secondary
-    if data.get("discount_rate") is not None:
-        prov.discount_rate = data["discount_rate"]
-
-    session.add(prov)
     await session.commit()
-    await session.refresh(prov)
+    province_catalog.apply_changes([prov])
     return prov
 
+@router.put("/{province_id}", response_model=ProvinceRead)
+async def replace_province(
+    province_id: int,
+    payload: ProvinceUpdate,
+    session: AsyncSession = Depends(get_write_session),
+):
+    data = {k: v for k, v in payload.model_dump(exclude_unset=False).items() if v is not None}
+    return await _update_province(session, province_id, _province_values(data))
+
 @router.patch("/{province_id}", response_model=ProvinceRead)
 async def update_province(
     province_id: int,
     payload: ProvinceUpdate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    prov = await session.get(Province, province_id)
-    if not prov:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
-
     data = payload.model_dump(exclude_unset=True)
-    if "name" in data:
-        prov.name = data["name"]
-    if "category" in data:
-        prov.category = data["category"].value
-        prov.is_primary = data["category"] == ProvinceCategory.primary
-        prov.is_secondary = data["category"] == ProvinceCategory.secondary
-    if "discount_rate" in data:
-        prov.discount_rate = data["discount_rate"]
-
-    session.add(prov)
-    await session.commit()
-    await session.refresh(prov)
-    return prov
+    return await _update_province(session, province_id, _province_values(data))
 
 @router.delete("/{province_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_province(
     province_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    prov = await session.get(Province, province_id)
-    if not prov:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
-    await session.delete(prov)
-    await session.commit()
+    # เก็บ tombstone ไว้ให้ /changes แจ้ง client ว่าถูกลบ
+    await _update_province(session, province_id, {"deleted_at": datetime.utcnow()})
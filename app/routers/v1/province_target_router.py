@@ -1,82 +1,155 @@
 # app/routers/v1/province_target_router.py
+from datetime import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import delete
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.models.province_target_model import ProvinceTarget
-from app.models.province_model import Province
-from app.schemas.province_target_schema import ProvinceTargetCreate, ProvinceTargetRead
-from app.core.security import get_current_user
+from app.schemas.province_schema import ProvinceRead
+from app.schemas.province_target_schema import (
+    ProvinceTargetBatchCreate,
+    ProvinceTargetCreate,
+    ProvinceTargetRead,
+)
+from app.core.config import settings
+from app.core.pagination import CursorPage
+from app.core.security import get_current_principal, Principal
+from app.services.group_commit import SELECTION_KEY, insert_or_get, selection_coalescer
+from app.services.popularity import bump_selection_counts, count_deltas
+from app.services.province_catalog import province_catalog
 
 router = APIRouter(
     prefix="/profile/selections",
     tags=["province_targets"],
-    dependencies=[Depends(get_current_user)],
+    dependencies=[Depends(get_current_principal)],
 )
 
-@router.post("/", response_model=ProvinceTargetRead, status_code=status.HTTP_201_CREATED)
-async def create_selection(
-    data: ProvinceTargetCreate,
-    current_user=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
-):
-    prov = await session.get(Province, data.province_id)
-    if not prov:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
-
-    sel = ProvinceTarget(user_id=current_user.id, province_id=prov.id)
-    session.add(sel)
-    await session.commit()
-    await session.refresh(sel)
-
+def _selection_read(sel, username: str, prov: ProvinceRead) -> ProvinceTargetRead:
     return ProvinceTargetRead(
         id=sel.id,
         user_id=sel.user_id,
-        username=current_user.username,
+        username=username,
         province_id=sel.province_id,
         province_name=prov.name,
         selected_at=sel.selected_at,
         discount_rate=prov.discount_rate,
-        category=prov.category,
+        category=prov.category.value,
         is_primary=prov.is_primary,
         is_secondary=prov.is_secondary,
     )
 
+@router.post(
+    "/",
+    response_model=ProvinceTargetRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={200: {"description": "Province was already selected; the existing selection is returned"}},
+)
+async def create_selection(
+    data: ProvinceTargetCreate,
+    response: Response,
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_write_session),
+    read_session: AsyncSession = Depends(get_read_session),
+):
+    # โหลด catalog ผ่าน read session: ถ้าใช้ session ตัวเขียน connection เดียวของตัวเขียน
+    # (เมื่อแยก read/write) จะถูกถือไว้ระหว่างที่ coalescer รอ connection เดียวกันนั้น
+    prov = await province_catalog.get(read_session, data.province_id)
+    if not prov:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Province not found")
+
+    values = dict(
+        user_id=current_user.id,
+        province_id=prov.id,
+        selected_at=datetime.utcnow(),
+    )
+    if settings.selection_group_commit:
+        sel, created = await selection_coalescer.add(**values)
+    else:
+        [(sel, created)] = await insert_or_get(session, ProvinceTarget, SELECTION_KEY, [values])
+        if created:
+            await bump_selection_counts(session, {prov.id: 1})
+        await session.commit()
+    if created:
+        province_catalog.apply_counts({prov.id: 1})
+
+    # กดซ้ำ (retry) ได้ผลเหมือนเดิม: คืนแถวที่มีอยู่แล้วด้วย 200
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return _selection_read(sel, current_user.username, prov)
+
+@router.post("/batch", response_model=List[ProvinceTargetRead])
+async def create_selections_batch(
+    data: ProvinceTargetBatchCreate,
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_write_session),
+    read_session: AsyncSession = Depends(get_read_session),
+):
+    """เลือกหลายจังหวัดในคำขอเดียว จังหวัดที่เลือกไว้แล้วจะคืนแถวเดิม"""
+    catalog = await province_catalog.snapshot(read_session)
+    province_ids = list(dict.fromkeys(data.province_ids))
+    missing = [pid for pid in province_ids if pid not in catalog.by_id]
+    if missing:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Province not found: {missing}")
+
+    now = datetime.utcnow()
+    results = await insert_or_get(session, ProvinceTarget, SELECTION_KEY, [
+        dict(user_id=current_user.id, province_id=pid, selected_at=now)
+        for pid in province_ids
+    ])
+    deltas = count_deltas(sel.province_id for sel, created in results if created)
+    await bump_selection_counts(session, deltas)
+    await session.commit()
+    province_catalog.apply_counts(deltas)
+
+    return [
+        _selection_read(sel, current_user.username, catalog.by_id[sel.province_id])
+        for sel, _ in results
+    ]
+
 @router.get("/", response_model=List[ProvinceTargetRead])
 async def list_selections(
-    current_user=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    page: CursorPage = Depends(),
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    stmt = select(ProvinceTarget).where(ProvinceTarget.user_id == current_user.id)
-    selections = (await session.exec(stmt)).all()
+    # query เฉพาะตาราง selection ส่วนข้อมูลจังหวัดมาจาก catalog ในหน่วยความจำ
+    stmt = select(
+        ProvinceTarget.id,
+        ProvinceTarget.user_id,
+        ProvinceTarget.province_id,
+        ProvinceTarget.selected_at,
+    ).where(ProvinceTarget.user_id == current_user.id)
+    rows = (await session.exec(page.apply(stmt, ProvinceTarget.id))).all()
+    catalog = await province_catalog.snapshot(session)
 
     output: List[ProvinceTargetRead] = []
-    for sel in selections:
-        prov = await session.get(Province, sel.province_id)
-        output.append(ProvinceTargetRead(
-            id=sel.id,
-            user_id=sel.user_id,
-            username=current_user.username,
-            province_id=sel.province_id,
-            province_name=prov.name,
-            selected_at=sel.selected_at,
-            discount_rate=prov.discount_rate,
-            category=prov.category,
-            is_primary=prov.is_primary,
-            is_secondary=prov.is_secondary,
-        ))
+    for row in page.finish(rows, request, response):
+        prov = catalog.by_id.get(row.province_id)
+        if prov is None:
+            # จังหวัดถูกลบไปแล้ว
+            continue
+        output.append(_selection_read(row, current_user.username, prov))
     return output
 
 @router.delete("/{selection_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_selection(
     selection_id: int,
-    current_user=Depends(get_current_user),
-    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    sel = await session.get(ProvinceTarget, selection_id)
-    if not sel or sel.user_id != current_user.id:
+    stmt = (
+        delete(ProvinceTarget)
+        .where(ProvinceTarget.id == selection_id, ProvinceTarget.user_id == current_user.id)
+        .returning(ProvinceTarget.province_id)
+    )
+    province_id = (await session.exec(stmt)).scalars().first()
+    if province_id is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Selection not found")
-    await session.delete(sel)
+    await bump_selection_counts(session, {province_id: -1})
     await session.commit()
+    province_catalog.apply_counts({province_id: -1})
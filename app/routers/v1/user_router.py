@@ -1,14 +1,27 @@
 # app/routers/v1/user_router.py
 
+import asyncio
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.database import get_read_session, get_write_session
+from app.models.province_target_model import ProvinceTarget
 from app.models.user_model import User
+from app.schemas.import_schema import ImportSummary
 from app.schemas.user_schema import UserCreate, UserRead, UserUpdate
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.pagination import CursorPage
+from app.core.security import get_current_user, invalidate_user, remember_token_version
+from app.services.bulk_import import run_import
+from app.services.passwords import hash_password
+from app.services.popularity import bump_selection_counts, count_deltas
+from app.services.province_catalog import province_catalog
+from app.services.registration import raise_for_unique_violation, register_user
 
 router = APIRouter(
     prefix="/users",
@@ -22,32 +35,57 @@ router = APIRouter(
 )
 async def create_user(
     payload: UserCreate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
+    return await register_user(session, payload)
 
-    exists = await session.exec(
-        select(User).where(
-            (User.username == payload.username) | (User.email == payload.email)
-        )
-    )
-    if exists.first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username or email already registered"
+
+@router.post(
+    "/import",
+    response_model=ImportSummary,
+    dependencies=[Depends(get_current_user)],
+)
+async def import_users(
+    request: Request,
+    session: AsyncSession = Depends(get_write_session),
+):
+    """
+    นำเข้าผู้ใช้จาก body แบบ NDJSON (ค่าเริ่มต้น) หรือ CSV (Content-Type: text/csv)
+    แต่ละแถวตาม UserCreate, แถวที่ชนกับผู้ใช้เดิม (username/phone/email/citizen_id)
+    จะถูกข้ามและรายงานใน errors
+    """
+    async def insert_batch(batch):
+        # hash ทีละกลุ่มไม่เกิน password_hash_concurrency งาน
+        # ไม่ให้ import ใหญ่จองคิว bcrypt ทั้งหมดจน login ต้องรอ
+        window = settings.password_hash_concurrency
+        hashes = []
+        for start in range(0, len(batch), window):
+            hashes += await asyncio.gather(
+                *(hash_password(data.password) for _, data in batch[start:start + window])
+            )
+
+        # insert ทีละแถวใน transaction เดียว แถวที่ไม่ได้ id กลับมาคือแถวที่ชน
+        # ทำให้รู้แน่ว่าบรรทัดไหนถูกปฏิเสธ รวมถึงแถวที่ซ้ำกันเองภายใน batch
+        stmt = (
+            sqlite_insert(User)
+            .on_conflict_do_nothing()
+            .returning(User.id)
         )
+        rejected = []
+        for (line, data), hashed in zip(batch, hashes):
+            result = await session.exec(stmt, params=dict(
+                username=data.username,
+                phone=data.phone,
+                email=data.email,
+                citizen_id=data.citizen_id,
+                hashed_password=hashed,
+            ))
+            if result.scalar() is None:
+                rejected.append((line, "already registered"))
+        await session.commit()
+        return rejected
 
-    hashed = payload.password + "_notreallyhashed"
-    user = User(
-        username=payload.username,
-        phone=payload.phone,
-        email=payload.email,
-        citizen_id=payload.citizen_id,
-        hashed_password=hashed,
-    )
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
-    return user
+    return await run_import(request, UserCreate, insert_batch)
 
 
 @router.get(
@@ -56,10 +94,13 @@ async def create_user(
     dependencies=[Depends(get_current_user)],
 )
 async def list_users(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    response: Response,
+    page: CursorPage = Depends(),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    result = await session.exec(select(User))
-    return result.all()
+    result = await session.exec(page.apply(select(User), User.id))
+    return page.finish(result.all(), request, response)
 
 
 @router.patch(
@@ -70,22 +111,34 @@ async def list_users(
 async def update_user(
     user_id: int,
     payload: UserUpdate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    user = await session.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
     data = payload.model_dump(exclude_unset=True)
+    # hash ก่อนแตะ DB เพื่อไม่ถือ connection ของตัวเขียนไว้ระหว่างรอ bcrypt
     if "password" in data:
-        user.hashed_password = data.pop("password") + "_notreallyhashed"
+        data["hashed_password"] = await hash_password(data.pop("password"))
 
-    for key, val in data.items():
-        setattr(user, key, val)
+    # token เดิมใช้ไม่ได้อีกเมื่อเปลี่ยนรหัสผ่านหรือชื่อผู้ใช้
+    if "hashed_password" in data or "username" in data:
+        data["token_version"] = User.token_version + 1
 
-    session.add(user)
+    # UPDATE ... RETURNING statement เดียว แทน get/commit/refresh
+    if data:
+        stmt = update(User).where(User.id == user_id).values(**data).returning(User)
+        try:
+            user = (await session.exec(stmt)).scalars().first()
+        except IntegrityError as exc:
+            await session.rollback()
+            raise_for_unique_violation(exc)
+    else:
+        user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     await session.commit()
-    await session.refresh(user)
+
+    # ชื่อเดิมต้องไม่ยืนยันตัวตนจาก cache ได้อีก (เปลี่ยนชื่อ/รหัสผ่าน)
+    invalidate_user(user.id)
+    remember_token_version(user.id, user)
     return user
 
 
@@ -96,10 +149,22 @@ async def update_user(
 )
 async def delete_user(
     user_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_write_session),
 ):
-    user = await session.get(User, user_id)
-    if not user:
+    # ลบ selection ของผู้ใช้ใน transaction เดียวกัน (SQLite ใช้ id เดิมซ้ำได้
+    # ผู้ใช้ใหม่จะได้ selection ที่ค้างอยู่ไปด้วย) และลด selection_count ตามจริง
+    stmt = (
+        delete(ProvinceTarget)
+        .where(ProvinceTarget.user_id == user_id)
+        .returning(ProvinceTarget.province_id)
+    )
+    deltas = count_deltas((await session.exec(stmt)).scalars().all(), -1)
+    stmt = delete(User).where(User.id == user_id).returning(User.id)
+    if (await session.exec(stmt)).first() is None:
+        await session.rollback()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    await session.delete(user)
+    await bump_selection_counts(session, deltas)
     await session.commit()
+    province_catalog.apply_counts(deltas)
+    invalidate_user(user_id)
+    remember_token_version(user_id, None)
@@ -0,0 +1,25 @@
+# app/schemas/deduction_schema.py
+from decimal import Decimal
+from typing import Annotated, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+class DeductionLine(BaseModel):
+    selection_id: int
+    province_id: int
+    province_name: str
+    category: str
+    discount_rate: str
+    spend: Decimal
+    deduction: Decimal
+
+class DeductionSummary(BaseModel):
+    user_id: int
+    spend_total: Decimal
+    deduction_total: Decimal
+    items: List[DeductionLine]
+
+class DeductionBatchRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=500)
+    # ยอดใช้จ่ายต่อจังหวัด ถ้าไม่ระบุใช้ amount (ค่าเริ่มต้น 0)
+    amount: Optional[Decimal] = Field(None, ge=0)
+    spends: Dict[int, Annotated[Decimal, Field(ge=0)]] = Field(default_factory=dict)
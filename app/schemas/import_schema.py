@@ -0,0 +1,13 @@
+# app/schemas/import_schema.py
+from typing import Any, List
+from pydantic import BaseModel
+
+class ImportRowError(BaseModel):
+    line: int
+    errors: List[Any]
+
+class ImportSummary(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    # แสดง error ไม่เกิน settings.import_max_errors รายการ (failed คือจำนวนจริง)
+    errors: List[ImportRowError] = []
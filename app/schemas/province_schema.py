@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Annotated, List, Optional, Union
 from enum import Enum
 from sqlmodel import SQLModel, Field
-from pydantic import field_validator
+from pydantic import Discriminator, Tag, field_validator
+
+from app.core.discount import bp_to_percent, percent_to_bp
 
 class ProvinceCategory(str, Enum):
     primary = "primary"
@@ -14,17 +16,29 @@ class ProvinceBase(SQLModel):
 
     @field_validator("discount_rate")
     def ensure_percent_format(cls, v: str) -> str:
-        if not v.endswith("%"):
-            raise ValueError("discount_rate must end with '%' (e.g. '10%')")
-        return v
+        return bp_to_percent(percent_to_bp(v))
 
 class ProvinceCreate(ProvinceBase):
     pass
 
+# body ของ POST /provinces: หนึ่งรายการ หรือ list
+# เลือก branch ตามชนิดของ input ก่อนตรวจ error จึงชี้ตำแหน่งเดียว เช่น ("body", "items", 1, "name")
+# list ถูกเขียนด้วย INSERT เดียว จึงจำกัดจำนวนให้อยู่ใต้เพดานจำนวน parameter ของ SQLite
+ProvinceCreatePayload = Annotated[
+    Union[
+        Annotated[ProvinceCreate, Tag("item")],
+        Annotated[List[ProvinceCreate], Field(max_length=500), Tag("items")],
+    ],
+    Discriminator(lambda v: "items" if isinstance(v, list) else "item"),
+]
+
 class ProvinceRead(ProvinceBase):
     id: int
     is_primary: bool
     is_secondary: bool
+    version: int = 0
+    discount_bp: int = 0
+    selection_count: int = 0
 
     model_config = {"from_attributes": True}
 
@@ -32,3 +46,18 @@ class ProvinceUpdate(SQLModel):
     name: Optional[str] = None
     category: Optional[ProvinceCategory] = None
     discount_rate: Optional[str] = None
+
+    @field_validator("discount_rate")
+    def ensure_percent_format(cls, v: Optional[str]) -> Optional[str]:
+        return None if v is None else bp_to_percent(percent_to_bp(v))
+
+class ProvinceChanges(SQLModel):
+    version: int
+    upserts: List[ProvinceRead]
+    deleted: List[int]
+
+class ProvinceSort(str, Enum):
+    id = "id"
+    discount = "discount"
+    discount_desc = "-discount"
+    popularity_desc = "-popularity"
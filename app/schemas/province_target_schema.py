@@ -1,10 +1,14 @@
 # app/schemas/province_target_schema.py
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from typing import List
+from pydantic import BaseModel, ConfigDict, Field
 
 class ProvinceTargetCreate(BaseModel):
     province_id: int
 
+class ProvinceTargetBatchCreate(BaseModel):
+    province_ids: List[int] = Field(..., min_length=1, max_length=500)
+
 class ProvinceTargetRead(BaseModel):
     id: int
     user_id: int
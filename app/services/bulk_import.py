@@ -0,0 +1,93 @@
+# app/services/bulk_import.py
+import csv
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Tuple, Type, TypeVar
+
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.schemas.import_schema import ImportRowError, ImportSummary
+
+M = TypeVar("M", bound=BaseModel)
+
+# รับ [(เลขบรรทัด, row)] แล้ว insert + commit เอง
+# คืน [(เลขบรรทัด, เหตุผล)] ของแถวที่ DB ไม่รับ เช่นข้อมูลซ้ำ
+InsertBatch = Callable[[List[Tuple[int, M]]], Awaitable[List[Tuple[int, str]]]]
+
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    """อ่าน body ทีละ chunk แล้วแยกเป็นบรรทัด โดยไม่เก็บทั้งไฟล์ไว้ในหน่วยความจำ"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    แปลงแต่ละบรรทัดเป็น dict ตาม Content-Type
+    text/csv ใช้บรรทัดแรกเป็น header (ไม่รองรับค่าที่มีขึ้นบรรทัดใหม่ใน quote)
+    นอกนั้นถือเป็น NDJSON (JSON หนึ่ง object ต่อบรรทัด)
+    """
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    header: List[str] = []
+    line_no = 0
+    async for line in iter_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        if not is_csv:
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as exc:
+                yield line_no, exc
+            continue
+        values = next(csv.reader([line]))
+        if not header:
+            header = [name.strip() for name in values]
+            continue
+        # ช่องว่างใน CSV ถือเป็น None
+        yield line_no, {k: (v if v != "" else None) for k, v in zip(header, values)}
+
+
+async def run_import(
+    request: Request,
+    model: Type[M],
+    insert_batch: InsertBatch,
+) -> ImportSummary:
+    """validate ทีละแถว แล้วเขียนทีละ batch (settings.import_batch_size แถวต่อ transaction)"""
+    summary = ImportSummary()
+    batch: List[Tuple[int, M]] = []
+
+    def reject(line: int, errors: List[Any]) -> None:
+        summary.failed += 1
+        if len(summary.errors) < settings.import_max_errors:
+            summary.errors.append(ImportRowError(line=line, errors=errors))
+
+    async def flush() -> None:
+        rejected = await insert_batch(batch)
+        for line, reason in rejected:
+            reject(line, [reason])
+        summary.inserted += len(batch) - len(rejected)
+        batch.clear()
+
+    async for line, record in iter_records(request):
+        if isinstance(record, Exception):
+            reject(line, [f"invalid JSON: {record}"])
+            continue
+        try:
+            batch.append((line, model.model_validate(record)))
+        except ValidationError as exc:
+            reject(line, exc.errors(include_url=False, include_context=False))
+            continue
+        if len(batch) >= settings.import_batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+    return summary
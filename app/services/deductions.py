@@ -0,0 +1,67 @@
+# app/services/deductions.py
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from app.core.config import settings
+from app.schemas.deduction_schema import DeductionLine, DeductionSummary
+from app.schemas.province_schema import ProvinceCategory, ProvinceRead
+
+CENT = Decimal("0.01")
+
+
+def category_multipliers() -> Dict[str, Decimal]:
+    return {
+        ProvinceCategory.primary.value: Decimal(str(settings.deduction_primary_multiplier)),
+        ProvinceCategory.secondary.value: Decimal(str(settings.deduction_secondary_multiplier)),
+    }
+
+
+def build_rate_table(provinces: Iterable[ProvinceRead]) -> Mapping[int, Decimal]:
+    """province_id -> อัตราลดหย่อนจริง (discount_rate x ตัวคูณของประเภทจังหวัด)"""
+    multipliers = category_multipliers()
+    return MappingProxyType({
+        prov.id: Decimal(prov.discount_bp) / 10000 * multipliers[prov.category.value]
+        for prov in provinces
+    })
+
+
+def summarize(
+    selections: Iterable[Any],
+    provinces: Mapping[int, ProvinceRead],
+    rates: Mapping[int, Decimal],
+    amount: Optional[Decimal],
+    spends: Mapping[int, Decimal],
+    user_ids: Iterable[int],
+) -> List[DeductionSummary]:
+    """
+    คำนวณลดหย่อนต่อ selection และรวมต่อผู้ใช้ ตามลำดับ user_ids
+    selections ต้องมี id, user_id, province_id; จังหวัดที่ถูกลบแล้วจะถูกข้าม
+    """
+    default = amount if amount is not None else Decimal(0)
+    lines: Dict[int, List[DeductionLine]] = defaultdict(list)
+    for sel in selections:
+        prov = provinces.get(sel.province_id)
+        if prov is None:
+            continue
+        spend = spends.get(sel.province_id, default)
+        lines[sel.user_id].append(DeductionLine(
+            selection_id=sel.id,
+            province_id=prov.id,
+            province_name=prov.name,
+            category=prov.category.value,
+            discount_rate=prov.discount_rate,
+            spend=spend,
+            deduction=(spend * rates[prov.id]).quantize(CENT, rounding=ROUND_HALF_UP),
+        ))
+
+    return [
+        DeductionSummary(
+            user_id=user_id,
+            spend_total=sum((line.spend for line in lines[user_id]), Decimal(0)),
+            deduction_total=sum((line.deduction for line in lines[user_id]), Decimal(0)),
+            items=lines[user_id],
+        )
+        for user_id in user_ids
+    ]
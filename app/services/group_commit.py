@@ -0,0 +1,152 @@
+# app/services/group_commit.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Set, Tuple, Type, TypeVar
+
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session
+from app.models.province_target_model import ProvinceTarget
+from app.services.popularity import bump_selection_counts, count_deltas
+
+T = TypeVar("T", bound=SQLModel)
+
+
+async def insert_or_get(
+    session: AsyncSession,
+    model: Type[T],
+    key_columns: Sequence[str],
+    rows: Sequence[Dict[str, Any]],
+) -> List[Tuple[T, bool]]:
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING สำหรับทุกแถวใน statement เดียว
+    แถวที่ชนกับ unique key เดิมจะถูกดึงกลับมาด้วย SELECT อีกครั้ง (เฉพาะเมื่อมีแถวซ้ำ)
+    คืน (row, สร้างใหม่หรือไม่) ตามลำดับของ rows; ไม่ commit
+    """
+    def key_of(values: Any) -> tuple:
+        if isinstance(values, dict):
+            return tuple(values[c] for c in key_columns)
+        return tuple(getattr(values, c) for c in key_columns)
+
+    stmt = (
+        sqlite_insert(model)
+        .on_conflict_do_nothing(index_elements=list(key_columns))
+        .returning(model)
+    )
+    inserted = {key_of(row): row for row in (await session.exec(stmt, params=list(rows))).scalars().all()}
+
+    existing: Dict[tuple, T] = {}
+    missing = {key_of(values) for values in rows} - inserted.keys()
+    if missing:
+        columns = [getattr(model, c) for c in key_columns]
+        result = await session.exec(select(model).where(tuple_(*columns).in_(list(missing))))
+        existing = {key_of(row): row for row in result.all()}
+
+    output: List[Tuple[T, bool]] = []
+    claimed: Set[tuple] = set()
+    for values in rows:
+        key = key_of(values)
+        if key in inserted:
+            # แถวซ้ำภายใน batch เดียวกัน: คนแรกเป็นผู้สร้าง
+            output.append((inserted[key], key not in claimed))
+            claimed.add(key)
+        else:
+            output.append((existing[key], False))
+    return output
+
+
+class WriteCoalescer(Generic[T]):
+    """
+    รวม INSERT ที่เข้ามาพร้อม ๆ กันให้ commit ใน transaction เดียว (group commit)
+
+    แถวที่เข้ามาภายใน window วินาที หรือครบ max_batch แถว จะถูกเขียนด้วย
+    insert_or_get ครั้งเดียว แล้วคืน (row, created) ให้ผู้เรียกแต่ละคน
+    ถ้า batch ล้มเหลว ทุกคนใน batch จะได้ exception เดียวกัน
+    before_commit (ถ้ามี) ถูกเรียกด้วย session และผลของ batch ก่อน commit
+    เพื่อเขียนข้อมูลที่ต้องอยู่ใน transaction เดียวกัน
+    """
+
+    def __init__(
+        self,
+        model: Type[T],
+        key_columns: Sequence[str],
+        session_factory: Callable[[], Any],
+        window: float,
+        max_batch: int,
+        before_commit: Optional[
+            Callable[[AsyncSession, List[Tuple[T, bool]]], Awaitable[None]]
+        ] = None,
+    ) -> None:
+        self.model = model
+        self.key_columns = key_columns
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self.before_commit = before_commit
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def add(self, **values: Any) -> Tuple[T, bool]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((values, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            async with self.session_factory() as session:
+                results = await insert_or_get(
+                    session, self.model, self.key_columns, [values for values, _ in batch]
+                )
+                if self.before_commit is not None:
+                    await self.before_commit(session, results)
+                await session.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+SELECTION_KEY = ("user_id", "province_id")
+
+
+async def _count_new_selections(
+    session: AsyncSession, results: List[Tuple[ProvinceTarget, bool]]
+) -> None:
+    await bump_selection_counts(
+        session, count_deltas(sel.province_id for sel, created in results if created)
+    )
+
+
+selection_coalescer: WriteCoalescer[ProvinceTarget] = WriteCoalescer(
+    ProvinceTarget,
+    SELECTION_KEY,
+    async_session,
+    window=settings.selection_group_commit_window_ms / 1000,
+    max_batch=settings.selection_group_commit_max_batch,
+    before_commit=_count_new_selections,
+)
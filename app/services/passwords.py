@@ -0,0 +1,69 @@
+# app/services/passwords.py
+import asyncio
+import hmac
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# รหัสผ่านแบบเก่าก่อนมี bcrypt (password + suffix) จะถูก hash ใหม่ตอน login สำเร็จ
+LEGACY_SUFFIX = "_notreallyhashed"
+
+_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+)
+
+# bcrypt ปล่อย GIL ระหว่างคำนวณ จึงรันบน thread pool ได้โดยไม่บล็อก event loop
+_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash",
+)
+_slots = asyncio.Semaphore(settings.password_hash_concurrency)
+
+
+async def _run(func, *args):
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # hash ที่ cost เท่ากับของจริง ใช้ตรวจเมื่อไม่พบผู้ใช้ (สร้างครั้งแรกที่ต้องใช้)
+    return _context.hash("dummy-password")
+
+
+def _verify_and_update(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if hashed is None:
+        # ไม่พบผู้ใช้: ยังต้องเสียเวลา bcrypt เท่ากัน เพื่อไม่ให้เวลาตอบบอกว่า username มีอยู่หรือไม่
+        _context.verify(password, _dummy_hash())
+        return False, None
+    if hashed.endswith(LEGACY_SUFFIX):
+        # เทียบแบบเวลาคงที่ ไม่ให้เวลาตอบบอกว่ารหัสผ่านตรงกันกี่ตัวอักษร
+        if not hmac.compare_digest((password + LEGACY_SUFFIX).encode(), hashed.encode()):
+            return False, None
+        return True, _context.hash(password)
+    try:
+        return _context.verify_and_update(password, hashed)
+    except ValueError:
+        # hash รูปแบบที่ไม่รู้จัก
+        return False, None
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_context.hash, password)
+
+
+async def verify_password(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    คืน (ถูกต้องหรือไม่, hash ใหม่)
+    hashed เป็น None เมื่อไม่พบผู้ใช้ จะตรวจกับ hash หลอกแล้วคืน (False, None)
+    hash ใหม่จะไม่เป็น None เมื่อ hash เดิมเป็นแบบเก่าหรือ cost ต่ำกว่า settings.bcrypt_rounds
+    ผู้เรียกควรบันทึกลง DB แทนค่าเดิม
+    """
+    return await _run(_verify_and_update, password, hashed)
@@ -0,0 +1,84 @@
+# app/services/popularity.py
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session
+from app.models.province_model import Province
+from app.models.province_target_model import ProvinceTarget
+from app.services.province_catalog import province_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def count_deltas(province_ids: Iterable[int], delta: int = 1) -> Dict[int, int]:
+    return {pid: n * delta for pid, n in Counter(province_ids).items()}
+
+
+async def bump_selection_counts(session: AsyncSession, deltas: Dict[int, int]) -> None:
+    """
+    บวก/ลบ Province.selection_count ตาม deltas (province_id -> จำนวน)
+    ใช้ session เดียวกับการเขียน selection และไม่ commit เอง
+    หลัง commit แล้วให้เรียก province_catalog.apply_counts(deltas)
+    """
+    deltas = {pid: d for pid, d in deltas.items() if d}
+    if not deltas:
+        return
+    stmt = (
+        update(Province.__table__)
+        .where(Province.__table__.c.id == bindparam("pid"))
+        .values(selection_count=Province.__table__.c.selection_count + bindparam("delta"))
+    )
+    await session.exec(stmt, params=[{"pid": pid, "delta": d} for pid, d in deltas.items()])
+
+
+def reconcile_statement():
+    """UPDATE แบบ correlated ที่แก้ selection_count ให้ตรงกับจำนวนใน ProvinceTarget"""
+    actual = (
+        select(func.count(ProvinceTarget.id))
+        .where(ProvinceTarget.province_id == Province.id)
+        .scalar_subquery()
+    )
+    return (
+        update(Province)
+        .where(Province.selection_count != actual)
+        .values(selection_count=actual)
+        .returning(Province.id)
+    )
+
+
+async def reconcile_selection_counts(session: AsyncSession) -> int:
+    """
+    คำนวณ selection_count ใหม่ทั้งหมดจาก ProvinceTarget แก้ค่าที่คลาดเคลื่อน
+    (เช่น selection ที่หายไปพร้อมผู้ใช้ หรือแก้ DB ตรง ๆ) คืนจำนวนจังหวัดที่ถูกแก้
+    """
+    fixed = len((await session.exec(reconcile_statement())).all())
+    await session.commit()
+    if fixed:
+        province_catalog.invalidate()
+    return fixed
+
+
+async def reconcile_forever(interval: float) -> None:
+    """background job สำหรับ lifespan: reconcile ทุก interval วินาที"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as session:
+                fixed = await reconcile_selection_counts(session)
+            if fixed:
+                logger.warning("reconciled selection_count of %d provinces", fixed)
+        except Exception:
+            logger.exception("selection_count reconcile failed")
+
+
+def start_reconcile_job() -> Optional[asyncio.Task]:
+    interval = settings.popularity_reconcile_seconds
+    if interval <= 0:
+        return None
+    return asyncio.create_task(reconcile_forever(interval))
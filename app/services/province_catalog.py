@@ -0,0 +1,163 @@
+# app/services/province_catalog.py
+import time
+import zlib
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.province_model import Province
+from app.schemas.province_schema import ProvinceRead
+from app.services.deductions import build_rate_table
+from app.services.province_search import ProvinceSearchIndex
+
+
+@dataclass(frozen=True)
+class ProvinceSnapshot:
+    """
+    สำเนาข้อมูลจังหวัดทั้งหมดแบบอ่านอย่างเดียว
+    ห้ามแก้ไข entry ใน snapshot ให้สร้าง snapshot ใหม่แทน
+    """
+    items: Tuple[ProvinceRead, ...]
+    by_id: Mapping[int, ProvinceRead]
+    by_category: Mapping[str, Tuple[ProvinceRead, ...]]
+    # change version สูงสุดของตาราง province (รวม tombstone)
+    version: int
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @cached_property
+    def etag(self) -> str:
+        # list/search/popular ส่ง selection_count ไปด้วย tag จึงต้องเปลี่ยนเมื่อ count เปลี่ยน
+        # (strong ETag: body ที่ได้ 304 ต้องเหมือนกับที่ client เก็บไว้ทุก byte)
+        counts = ",".join(f"{p.id}:{p.selection_count}" for p in self.items)
+        return f'"v{self.version}-{zlib.crc32(counts.encode()):08x}"'
+
+    @staticmethod
+    def item_etag(province: ProvinceRead) -> str:
+        # ต่อแถว: เปลี่ยนเมื่อจังหวัดนี้ถูกแก้หรือ selection_count ของจังหวัดนี้เปลี่ยน
+        return f'"p{province.id}-v{province.version}-c{province.selection_count}"'
+
+    @cached_property
+    def popular(self) -> Tuple[ProvinceRead, ...]:
+        return tuple(sorted(self.items, key=lambda p: (-p.selection_count, p.id)))
+
+    @cached_property
+    def search_index(self) -> ProvinceSearchIndex:
+        # สร้างครั้งแรกที่มีการค้นหา และทิ้งไปพร้อม snapshot เมื่อ catalog เปลี่ยน
+        return ProvinceSearchIndex(self.items)
+
+    @cached_property
+    def deduction_rates(self) -> Mapping[int, Decimal]:
+        return build_rate_table(self.items)
+
+    @classmethod
+    def build(
+        cls,
+        provinces: Iterable[ProvinceRead],
+        version: int,
+        loaded_at: Optional[float] = None,
+    ) -> "ProvinceSnapshot":
+        items = tuple(sorted(provinces, key=lambda p: p.id))
+        by_category: dict = {}
+        for prov in items:
+            by_category.setdefault(prov.category.value, []).append(prov)
+        return cls(
+            items=items,
+            by_id=MappingProxyType({p.id: p for p in items}),
+            by_category=MappingProxyType({k: tuple(v) for k, v in by_category.items()}),
+            version=version,
+            loaded_at=time.monotonic() if loaded_at is None else loaded_at,
+        )
+
+
+class ProvinceCatalog:
+    """
+    ให้บริการอ่านข้อมูลจังหวัดจากหน่วยความจำ
+
+    โหลดครั้งแรกตอน startup (หรือตอนใช้งานครั้งแรก) แล้วให้ handler ที่เขียน
+    ข้อมูลเรียก apply_changes หลัง commit เพื่อสลับ snapshot ใหม่แบบ atomic
+    โหลดใหม่จาก DB ทุก settings.province_catalog_refresh_seconds
+    เผื่อมีการแก้ไขจาก process อื่น (0 = ไม่โหลดใหม่)
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[ProvinceSnapshot] = None
+        # เพิ่มทุกครั้งที่ snapshot ถูกเปลี่ยน ใช้ตรวจว่า load() ที่กำลังรอ DB ล้าสมัยแล้วหรือยัง
+        self._generation = 0
+        # สถิติสำหรับ /metrics: อ่านจาก snapshot เดิม / ต้องโหลดจาก DB
+        self.hits = 0
+        self.misses = 0
+
+    def _install(self, snapshot: Optional[ProvinceSnapshot]) -> None:
+        self._snapshot = snapshot
+        self._generation += 1
+
+    async def load(self, session: AsyncSession) -> ProvinceSnapshot:
+        generation = self._generation
+        result = await session.exec(select(Province))
+        rows = result.all()
+        snapshot = ProvinceSnapshot.build(
+            (ProvinceRead.model_validate(p) for p in rows if p.deleted_at is None),
+            version=max((p.version for p in rows), default=0),
+        )
+        if self._generation != generation:
+            # มีการเขียนระหว่างรอ SELECT: ผลที่โหลดอาจเก่ากว่า snapshot ปัจจุบัน จึงไม่ติดตั้งทับ
+            return self._snapshot or snapshot
+        self._install(snapshot)
+        return snapshot
+
+    async def snapshot(self, session: AsyncSession) -> ProvinceSnapshot:
+        snapshot = self._snapshot
+        refresh = settings.province_catalog_refresh_seconds
+        if snapshot is None or (refresh > 0 and time.monotonic() - snapshot.loaded_at > refresh):
+            self.misses += 1
+            snapshot = await self.load(session)
+        else:
+            self.hits += 1
+        return snapshot
+
+    async def get(self, session: AsyncSession, province_id: int) -> Optional[ProvinceRead]:
+        return (await self.snapshot(session)).by_id.get(province_id)
+
+    def apply_changes(self, provinces: Iterable[Province]) -> None:
+        """รับแถวที่เพิ่ง commit (รวม tombstone) แล้วสร้าง snapshot ใหม่"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # ยังไม่มี snapshot แต่ load() ที่ค้างอยู่อาจอ่านก่อน commit นี้
+            self._generation += 1
+            return
+        by_id = dict(snapshot.by_id)
+        version = snapshot.version
+        for prov in provinces:
+            if prov.deleted_at is None:
+                by_id[prov.id] = ProvinceRead.model_validate(prov)
+            else:
+                by_id.pop(prov.id, None)
+            version = max(version, prov.version)
+        self._install(ProvinceSnapshot.build(by_id.values(), version, snapshot.loaded_at))
+
+    def apply_counts(self, deltas: Dict[int, int]) -> None:
+        """ปรับ selection_count ใน snapshot หลัง commit (province_id -> จำนวนที่เปลี่ยน)"""
+        snapshot = self._snapshot
+        if not any(deltas.values()):
+            return
+        if snapshot is None:
+            self._generation += 1
+            return
+        by_id = dict(snapshot.by_id)
+        for pid, delta in deltas.items():
+            prov = by_id.get(pid)
+            if prov is not None and delta:
+                by_id[pid] = prov.model_copy(update={"selection_count": prov.selection_count + delta})
+        self._install(ProvinceSnapshot.build(by_id.values(), snapshot.version, snapshot.loaded_at))
+
+    def invalidate(self) -> None:
+        self._install(None)
+
+
+province_catalog = ProvinceCatalog()
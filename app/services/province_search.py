@@ -0,0 +1,81 @@
+# app/services/province_search.py
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.schemas.province_schema import ProvinceRead
+
+# ภาษาไทยไม่มีช่องว่างระหว่างคำ จึงตัดคำไม่ได้แบบง่าย ๆ
+# ใช้ bigram ของตัวอักษรแทน: ค้น substring ได้ทุกตำแหน่งโดยไม่ต้องมีพจนานุกรม
+NGRAM = 2
+
+_IGNORED = {"Zs", "Zl", "Zp", "Cc", "Cf", "Pd", "Po", "Ps", "Pe"}
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold แล้วตัดช่องว่าง/เครื่องหมาย/zero-width ออก"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return "".join(ch for ch in text if unicodedata.category(ch) not in _IGNORED)
+
+
+def ngrams(text: str) -> Set[str]:
+    if len(text) < NGRAM:
+        return {text} if text else set()
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class ProvinceSearchIndex:
+    """
+    inverted index แบบ bigram -> id จังหวัด สร้างจาก snapshot ของ catalog
+
+    ลำดับผลลัพธ์: ตรงทั้งชื่อ > ขึ้นต้นด้วยคำค้น > มีคำค้นอยู่ในชื่อ (ยิ่งใกล้ต้นยิ่งดี)
+    > ชื่อที่มี bigram ร่วมกับคำค้นอย่างน้อยครึ่งหนึ่ง (กรณีพิมพ์ผิดเล็กน้อย)
+    """
+
+    def __init__(self, provinces: Iterable[ProvinceRead]) -> None:
+        self._by_id: Dict[int, ProvinceRead] = {}
+        self._keys: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        for prov in provinces:
+            key = normalize(prov.name)
+            self._by_id[prov.id] = prov
+            self._keys[prov.id] = key
+            for gram in ngrams(key):
+                self._postings.setdefault(gram, set()).add(prov.id)
+
+    def search(self, query: str, limit: int) -> List[ProvinceRead]:
+        q = normalize(query)
+        if not q:
+            return []
+
+        grams = ngrams(q)
+        if len(q) < NGRAM:
+            # ตัวอักษรเดียว: ไม่มี bigram ให้ใช้ ไล่ตรวจทุกชื่อ (จำนวนจังหวัดน้อย)
+            candidates: Iterable[int] = self._keys
+        else:
+            postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            candidates = set.intersection(*postings) if postings[0] else set()
+
+        scored: List[Tuple[Tuple[int, int, int], int]] = []
+        for pid in candidates:
+            key = self._keys[pid]
+            pos = key.find(q)
+            if pos < 0:
+                continue
+            tier = 0 if key == q else 1 if pos == 0 else 2
+            scored.append(((tier, pos, len(key)), pid))
+
+        if not scored and len(grams) > 1:
+            # ไม่มีชื่อไหนมีคำค้นทั้งคำ: จัดอันดับตามจำนวน bigram ที่ตรงกัน
+            hits: Dict[int, int] = {}
+            for gram in grams:
+                for pid in self._postings.get(gram, ()):
+                    hits[pid] = hits.get(pid, 0) + 1
+            need = (len(grams) + 1) // 2
+            scored = [
+                ((3, -count, len(self._keys[pid])), pid)
+                for pid, count in hits.items()
+                if count >= need
+            ]
+
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [self._by_id[pid] for _, pid in scored[:limit]]
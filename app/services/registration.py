@@ -0,0 +1,52 @@
+# app/services/registration.py
+import re
+from typing import NoReturn
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.user_model import User
+from app.schemas.user_schema import UserCreate
+from app.services.passwords import hash_password
+
+# unique index ที่ประกาศไว้ใน User
+UNIQUE_FIELDS = ("username", "phone", "email", "citizen_id")
+
+_UNIQUE_FAILED = re.compile(r"UNIQUE constraint failed: ([\w.]+)")
+
+
+def raise_for_unique_violation(exc: IntegrityError) -> NoReturn:
+    """แปลง IntegrityError จาก unique index ของ user เป็น 409 ที่บอกว่าช่องไหนซ้ำ"""
+    match = _UNIQUE_FAILED.search(str(exc.orig))
+    if match:
+        field = match.group(1).rsplit(".", 1)[-1]
+        if field in UNIQUE_FIELDS:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"{field} already registered",
+            ) from exc
+    raise exc
+
+
+async def register_user(session: AsyncSession, payload: UserCreate) -> User:
+    """
+    INSERT ... RETURNING ครั้งเดียว โดยไม่ SELECT ตรวจก่อน
+    ให้ unique index ใน DB เป็นตัวตัดสินข้อมูลซ้ำ (ไม่มี race ระหว่าง signup พร้อมกัน)
+    """
+    hashed = await hash_password(payload.password)
+    stmt = insert(User).values(
+        username=payload.username,
+        phone=payload.phone,
+        email=payload.email,
+        citizen_id=payload.citizen_id,
+        hashed_password=hashed,
+    ).returning(User)
+    try:
+        user = (await session.exec(stmt)).scalars().one()
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        raise_for_unique_violation(exc)
+    return user
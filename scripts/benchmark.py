@@ -0,0 +1,383 @@
+"""
+Benchmark ทุก router ของ app.main.app แบบ in-process ผ่าน httpx.ASGITransport
+กับไฟล์ SQLite ที่ seed ใหม่ทุกครั้ง (ผลซ้ำได้ด้วย --seed)
+
+    poetry run python scripts/benchmark.py --requests 500 --concurrency 16 --output bench.json
+    poetry run python scripts/benchmark.py --baseline bench.json --max-regression 20
+
+รายงาน p50/p95/p99 (ms) และ requests/second ต่อ endpoint เป็น JSON
+ถ้าให้ --baseline จะจบด้วย exit code 1 เมื่อ endpoint ใดช้าลงเกิน --max-regression %
+หรือมี error มากกว่าใน baseline
+ค่าตั้งอื่นของแอป (DB_PROFILE, AUTH_STATELESS, BCRYPT_ROUNDS ...) อ่านจาก env ตามปกติ
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+PASSWORD = "benchmark-password"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="SQLite file to (re)create and seed")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--provinces", type=int, default=77)
+    parser.add_argument("--selections-per-user", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", action="append", default=[], help="run only endpoints whose name contains this (repeatable)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--metric", choices=["p50_ms", "p95_ms", "p99_ms"], default="p95_ms")
+    return parser.parse_args(argv)
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    # ต้องตั้งก่อน import app เพราะ settings/engine ถูกสร้างตอน import
+    db_path = Path(args.db).resolve()
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+
+async def seed(args: argparse.Namespace) -> None:
+    from sqlalchemy import insert
+
+    import app.models as models
+    from app.database import async_session
+    from app.models.province_model import Province
+    from app.models.province_target_model import ProvinceTarget
+    from app.models.user_model import User
+    from app.services.passwords import hash_password
+
+    rng = random.Random(args.seed)
+    await models.init_db()
+    hashed = await hash_password(PASSWORD)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    async with async_session() as session:
+        await session.exec(insert(User), params=[
+            dict(username=f"user{i}", phone=f"08{i:08d}", email=f"user{i}@example.com", hashed_password=hashed)
+            for i in range(args.users)
+        ])
+        await session.exec(insert(Province), params=[
+            dict(
+                name=f"จังหวัด{i}",
+                category="secondary" if i % 3 else "primary",
+                discount_bp=rng.choice((0, 500, 1000, 1500, 2000)),
+                is_primary=not i % 3,
+                is_secondary=bool(i % 3),
+                version=1,
+            )
+            for i in range(args.provinces)
+        ])
+        per_user = min(args.selections_per_user, args.provinces)
+        await session.exec(insert(ProvinceTarget), params=[
+            dict(user_id=uid, province_id=pid, selected_at=now)
+            for uid in range(1, args.users + 1)
+            for pid in rng.sample(range(1, args.provinces + 1), per_user)
+        ])
+        await session.commit()
+
+    from app.services.popularity import reconcile_selection_counts
+    async with async_session() as session:
+        await reconcile_selection_counts(session)
+
+
+@dataclass
+class Context:
+    users: int
+    provinces: int
+    tokens: Dict[int, str] = field(default_factory=dict)
+    selection_ids: List[Tuple[int, int]] = field(default_factory=list)
+    # จังหวัดที่สร้างไว้ให้ DELETE โดยไม่แตะชุดที่ seed
+    disposable_provinces: List[int] = field(default_factory=list)
+
+    def auth(self, i: int) -> Dict[str, str]:
+        uid = i % self.users + 1
+        return {"Authorization": f"Bearer {self.tokens[uid]}"}
+
+    def province(self, i: int) -> int:
+        return i % self.provinces + 1
+
+
+Request = Callable[[Any, Context, int], Awaitable[Any]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Request
+    prepare: Optional[Callable[[Any, Context, int], Awaitable[None]]] = None
+
+
+async def _prepare_selection_ids(client, ctx: Context, count: int) -> None:
+    # ให้ผู้ใช้เลือกทุกจังหวัดไว้ก่อน จน DELETE มีแถวให้ลบครบทุกครั้ง: (index ผู้ใช้, selection id)
+    ctx.selection_ids = []
+    for user_index in range(ctx.users):
+        if len(ctx.selection_ids) >= count:
+            break
+        created = await client.post(
+            "/v1/profile/selections/batch",
+            json={"province_ids": list(range(1, ctx.provinces + 1))},
+            headers=ctx.auth(user_index),
+        )
+        ctx.selection_ids += [(user_index, row["id"]) for row in created.json()]
+
+
+async def _prepare_disposable_provinces(client, ctx: Context, count: int) -> None:
+    created = await client.post(
+        "/v1/provinces/",
+        json=[{"name": f"disposable{i}", "category": "secondary"} for i in range(count)],
+        headers=ctx.auth(0),
+    )
+    ctx.disposable_provinces = [row["id"] for row in created.json()]
+
+
+def _ndjson(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode()
+
+
+IMPORT_ROWS = 50
+# import ผู้ใช้ต้อง hash รหัสผ่านทุกแถว จึงใช้ batch เล็กกว่า
+IMPORT_USER_ROWS = 5
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("POST /v1/authentication/login", lambda c, ctx, i: c.post(
+        "/v1/authentication/login",
+        data={"username": f"user{i % ctx.users}", "password": PASSWORD},
+    )),
+    Scenario("POST /v1/authentication/register", lambda c, ctx, i: c.post(
+        "/v1/authentication/register",
+        json={"username": f"register{i}", "phone": f"09{i:08d}", "password": PASSWORD},
+    )),
+    Scenario("GET /v1/provinces/", lambda c, ctx, i: c.get("/v1/provinces/", headers=ctx.auth(i))),
+    Scenario("GET /v1/provinces/ (filtered)", lambda c, ctx, i: c.get(
+        "/v1/provinces/",
+        params={"category": "secondary", "min_discount": 5, "sort": "-discount"},
+        headers=ctx.auth(i),
+    )),
+    Scenario("GET /v1/provinces/{province_id}", lambda c, ctx, i: c.get(
+        f"/v1/provinces/{ctx.province(i)}", headers=ctx.auth(i),
+    )),
+    Scenario("GET /v1/provinces/search", lambda c, ctx, i: c.get(
+        "/v1/provinces/search", params={"q": f"จังหวัด{i % 10}"}, headers=ctx.auth(i),
+    )),
+    Scenario("POST /v1/provinces/", lambda c, ctx, i: c.post(
+        "/v1/provinces/",
+        json={"name": f"bench{i}", "category": "secondary", "discount_rate": "10%"},
+        headers=ctx.auth(i),
+    )),
+    Scenario("PATCH /v1/provinces/{province_id}", lambda c, ctx, i: c.patch(
+        f"/v1/provinces/{ctx.province(i)}",
+        json={"discount_rate": f"{i % 30}%"},
+        headers=ctx.auth(i),
+    )),
+    Scenario("PUT /v1/provinces/{province_id}", lambda c, ctx, i: c.put(
+        f"/v1/provinces/{ctx.province(i)}",
+        # ชื่อเดิมตอน seed เพื่อให้ผลของ scenario search คงที่
+        json={"name": f"จังหวัด{ctx.province(i) - 1}", "category": "secondary", "discount_rate": f"{i % 20}%"},
+        headers=ctx.auth(i),
+    )),
+    Scenario(
+        "DELETE /v1/provinces/{province_id}",
+        lambda c, ctx, i: c.delete(f"/v1/provinces/{ctx.disposable_provinces[i]}", headers=ctx.auth(i)),
+        prepare=_prepare_disposable_provinces,
+    ),
+    Scenario(f"POST /v1/provinces/import ({IMPORT_ROWS} rows)", lambda c, ctx, i: c.post(
+        "/v1/provinces/import",
+        content=_ndjson([
+            {"name": f"imported{i}-{j}", "category": "secondary", "discount_rate": "5%"}
+            for j in range(IMPORT_ROWS)
+        ]),
+        headers={**ctx.auth(i), "Content-Type": "application/x-ndjson"},
+    )),
+    Scenario("POST /v1/profile/selections/", lambda c, ctx, i: c.post(
+        "/v1/profile/selections/", json={"province_id": ctx.province(i * 7)}, headers=ctx.auth(i),
+    )),
+    Scenario("GET /v1/profile/selections/", lambda c, ctx, i: c.get(
+        "/v1/profile/selections/", headers=ctx.auth(i),
+    )),
+    Scenario(
+        "DELETE /v1/profile/selections/{selection_id}",
+        lambda c, ctx, i: c.delete(
+            f"/v1/profile/selections/{ctx.selection_ids[i][1]}",
+            headers=ctx.auth(ctx.selection_ids[i][0]),
+        ),
+        prepare=_prepare_selection_ids,
+    ),
+    Scenario("GET /v1/profile/deductions/", lambda c, ctx, i: c.get(
+        "/v1/profile/deductions/", params={"amount": 1000}, headers=ctx.auth(i),
+    )),
+    Scenario("GET /v1/users/", lambda c, ctx, i: c.get(
+        "/v1/users/", params={"after": i % ctx.users, "limit": 50}, headers=ctx.auth(i),
+    )),
+    Scenario("PATCH /v1/users/{user_id}", lambda c, ctx, i: c.patch(
+        f"/v1/users/{i % ctx.users + 1}",
+        json={"email": f"user{i % ctx.users}+{i}@example.com"},
+        headers=ctx.auth(i),
+    )),
+    Scenario(f"POST /v1/users/import ({IMPORT_USER_ROWS} rows)", lambda c, ctx, i: c.post(
+        "/v1/users/import",
+        content=_ndjson([
+            {"username": f"imported{i}-{j}", "phone": f"07{i:05d}{j:03d}", "password": PASSWORD}
+            for j in range(IMPORT_USER_ROWS)
+        ]),
+        headers={**ctx.auth(i), "Content-Type": "application/x-ndjson"},
+    )),
+    Scenario("GET /v1/export/selections", lambda c, ctx, i: c.get(
+        "/v1/export/selections", params={"format": "ndjson"}, headers=ctx.auth(i),
+    )),
+    Scenario("GET /v1/export/users (csv)", lambda c, ctx, i: c.get(
+        "/v1/export/users", params={"format": "csv"}, headers=ctx.auth(i),
+    )),
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values) + 0.5 - 1e-9))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client, ctx: Context, scenario: Scenario, requests: int, concurrency: int) -> Dict[str, Any]:
+    if scenario.prepare is not None:
+        await scenario.prepare(client, ctx, requests)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await scenario.run(client, ctx, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    ms = sorted(value * 1000 for value in latencies)
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "rps": round(len(ms) / wall, 1) if wall else 0.0,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    from app.core.security import create_user_token
+    from app.database import async_session
+    from app.main import app
+    from app.models.user_model import User
+    from sqlmodel import select
+
+    await seed(args)
+
+    results: Dict[str, Any] = {}
+    async with app.router.lifespan_context(app):
+        ctx = Context(users=args.users, provinces=args.provinces)
+        async with async_session() as session:
+            for user in (await session.exec(select(User))).all():
+                ctx.tokens[user.id] = create_user_token(user)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in SCENARIOS:
+                if args.only and not any(part in scenario.name for part in args.only):
+                    continue
+                stats = await run_scenario(client, ctx, scenario, args.requests, args.concurrency)
+                results[scenario.name] = stats
+                print(
+                    f"{scenario.name:<48} p50={stats['p50_ms']:>8.2f}ms p95={stats['p95_ms']:>8.2f}ms "
+                    f"p99={stats['p99_ms']:>8.2f}ms {stats['rps']:>8.1f} req/s errors={stats['errors']}",
+                    file=sys.stderr,
+                )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "provinces": args.provinces,
+            "selections_per_user": args.selections_per_user,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "db_profile": os.environ.get("DB_PROFILE", "development"),
+        },
+        "endpoints": results,
+    }
+
+
+def find_regressions(current: Dict[str, Any], baseline: Dict[str, Any], metric: str, max_regression: float) -> List[str]:
+    regressions = []
+    for name, stats in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        # error ที่เพิ่งเกิดหรือเพิ่มขึ้นถือว่าถดถอยเสมอ (request ที่ล้มมักเร็วกว่าที่สำเร็จ)
+        errors_before = (before or {}).get("errors", 0)
+        if stats["errors"] > errors_before:
+            regressions.append(f"{name}: errors {errors_before} -> {stats['errors']}")
+        if not before or not before.get(metric):
+            continue
+        change = (stats[metric] - before[metric]) / before[metric] * 100
+        if change > max_regression:
+            regressions.append(
+                f"{name}: {metric} {before[metric]:.2f}ms -> {stats[metric]:.2f}ms (+{change:.1f}%)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    configure_env(args)
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = find_regressions(report, baseline, args.metric, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
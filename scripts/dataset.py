@@ -0,0 +1,272 @@
+"""
+สร้างข้อมูลจำลองขนาดใหญ่ลง SQLite โดยตรง และรายงานเวลา + EXPLAIN QUERY PLAN
+ของ query หลักของแอปที่ข้อมูลแต่ละขนาด
+
+    # สร้างไฟล์เดียว
+    poetry run python scripts/dataset.py generate --db data-1m.db --targets 1000000
+
+    # รายงานที่หลายขนาด (สร้างไฟล์ให้ถ้ายังไม่มี)
+    poetry run python scripts/dataset.py report --sizes 10000,1000000,10000000 --workdir /tmp/wtt
+
+generate ใช้ sqlite3 executemany ทีละ chunk ใน transaction ใหญ่ และปิด journal/sync
+ระหว่างโหลด (ไฟล์นี้ใช้ทดสอบเท่านั้น) query ใน report สร้างจาก model ของแอป
+ให้ตรงกับ SQL ที่ endpoint ใช้จริง
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# settings ของแอปต้องมีค่าเหล่านี้ก่อน import app.*
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET_KEY", "dataset")
+os.environ.setdefault("SECRET_KEY", "dataset")
+
+CHUNK = 100_000
+PASSWORD = "dataset-password"
+
+
+def _chunks(rows: Iterable[tuple], size: int = CHUNK) -> Iterator[List[tuple]]:
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def create_schema(db_path: Path) -> None:
+    from sqlalchemy import create_engine
+    from sqlmodel import SQLModel
+
+    import app.models.province_model  # noqa: F401  (ลงทะเบียนตารางใน metadata)
+    import app.models.user_model  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    SQLModel.metadata.create_all(engine)
+    engine.dispose()
+
+
+def generate(db_path: Path, targets: int, users: Optional[int], provinces: int, seed: int) -> Dict[str, Any]:
+    """สร้างไฟล์ใหม่ที่มี ProvinceTarget `targets` แถว คืนจำนวนแถวและเวลาที่ใช้"""
+    from app.services.passwords import hash_password
+
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    started = time.perf_counter()
+    create_schema(db_path)
+
+    rng = random.Random(seed)
+    # จำนวน selection ต่อผู้ใช้แบบไม่สม่ำเสมอ (ส่วนใหญ่น้อย บางคนมาก) ผลรวมเท่ากับ targets
+    # ผู้ใช้คนหนึ่งเลือกจังหวัดหนึ่งได้ครั้งเดียว จึงไม่เกินจำนวนจังหวัด
+    per_user: List[int] = []
+    remaining = targets
+    while remaining > 0:
+        count = min(remaining, provinces, 1 + int(rng.expovariate(1 / 4)))
+        per_user.append(count)
+        remaining -= count
+    users = max(users or 0, len(per_user), 1)
+    hashed = asyncio.run(hash_password(PASSWORD))
+    # สุ่มเวลาจากชุดที่สร้างไว้ล่วงหน้า ถูกกว่า format datetime ทีละแถวมาก
+    epoch = datetime(2025, 1, 1)
+    timestamps = [
+        (epoch + timedelta(seconds=rng.randrange(365 * 86400))).strftime("%Y-%m-%d %H:%M:%S.%f")
+        for _ in range(4096)
+    ]
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    with conn:
+        conn.executemany(
+            "INSERT INTO province (id, name, category, discount_bp, is_primary, is_secondary, version, selection_count)"
+            " VALUES (?, ?, ?, ?, ?, ?, 1, 0)",
+            [
+                (pid, f"จังหวัด{pid}", "primary" if pid % 4 == 0 else "secondary",
+                 rng.choice((0, 500, 1000, 1500, 2000)), pid % 4 == 0, pid % 4 != 0)
+                for pid in range(1, provinces + 1)
+            ],
+        )
+        for chunk in _chunks(
+            (uid, f"user{uid}", f"08{uid:08d}", f"user{uid}@example.com", None, hashed, 0)
+            for uid in range(1, users + 1)
+        ):
+            conn.executemany(
+                "INSERT INTO user (id, username, phone, email, citizen_id, hashed_password, token_version)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                chunk,
+            )
+
+        def selections() -> Iterator[tuple]:
+            sid = 0
+            province_ids = range(1, provinces + 1)
+            for uid, count in enumerate(per_user, start=1):
+                for pid in rng.sample(province_ids, count):
+                    sid += 1
+                    yield (sid, uid, pid, timestamps[sid & 4095])
+
+        for chunk in _chunks(selections()):
+            conn.executemany(
+                "INSERT INTO provincetarget (id, user_id, province_id, selected_at) VALUES (?, ?, ?, ?)",
+                chunk,
+            )
+        conn.execute(
+            "UPDATE province SET selection_count ="
+            " (SELECT count(*) FROM provincetarget WHERE provincetarget.province_id = province.id)"
+        )
+    conn.execute("ANALYZE")
+    rows = conn.execute("SELECT count(*) FROM provincetarget").fetchone()[0]
+    conn.close()
+
+    return {
+        "db": str(db_path),
+        "users": users,
+        "provinces": provinces,
+        "province_targets": rows,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def key_queries(max_user_id: int) -> List[Tuple[str, Callable[[random.Random], Any]]]:
+    """(ชื่อ, ฟังก์ชันสร้าง statement จาก rng) ของ query ที่ endpoint ใช้"""
+    from sqlmodel import select
+
+    from app.models.province_model import Province
+    from app.models.province_target_model import ProvinceTarget
+    from app.models.user_model import User
+    from app.services.popularity import reconcile_statement
+
+    def user_id(rng: random.Random) -> int:
+        return rng.randint(1, max_user_id)
+
+    selection_columns = (
+        ProvinceTarget.id, ProvinceTarget.user_id, ProvinceTarget.province_id, ProvinceTarget.selected_at,
+    )
+    return [
+        ("get_current_user: user by username", lambda rng: (
+            select(User).where(User.username == f"user{user_id(rng)}")
+        )),
+        ("list_selections: all of one user", lambda rng: (
+            select(*selection_columns).where(ProvinceTarget.user_id == user_id(rng)).order_by(ProvinceTarget.id)
+        )),
+        ("list_selections: page of one user", lambda rng: (
+            select(*selection_columns)
+            .where(ProvinceTarget.user_id == user_id(rng), ProvinceTarget.id > 0)
+            .order_by(ProvinceTarget.id)
+            .limit(51)
+        )),
+        ("list_users: keyset page", lambda rng: (
+            select(User).where(User.id > user_id(rng)).order_by(User.id).limit(51)
+        )),
+        ("deductions batch: 100 users", lambda rng: (
+            select(ProvinceTarget.id, ProvinceTarget.user_id, ProvinceTarget.province_id)
+            .where(ProvinceTarget.user_id.in_([user_id(rng) for _ in range(100)]))
+            .order_by(ProvinceTarget.id)
+        )),
+        ("provinces: filtered by category/discount", lambda rng: (
+            select(Province)
+            .where(Province.deleted_at.is_(None), Province.category == "secondary", Province.discount_bp >= 1000)
+            .order_by(Province.discount_bp.desc(), Province.id)
+        )),
+        # UPDATE เดียวกับ reconcile_selection_counts (report_one rollback ทุกครั้ง)
+        ("reconcile: correlated UPDATE", lambda rng: reconcile_statement()),
+    ]
+
+
+def _compile(stmt: Any) -> str:
+    from sqlalchemy.dialects import sqlite
+
+    return str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def report_one(db_path: Path, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    # เปิดแบบเขียนได้เพราะ reconcile เป็น UPDATE แต่ rollback หลังทุก query ข้อมูลจึงไม่เปลี่ยน
+    conn = sqlite3.connect(db_path)
+    max_user_id = conn.execute("SELECT max(id) FROM user").fetchone()[0] or 1
+    rng = random.Random(seed)
+
+    results = []
+    for name, build in key_queries(max_user_id):
+        timings, rows = [], 0
+        for _ in range(repeat):
+            sql = _compile(build(rng))
+            started = time.perf_counter()
+            rows = len(conn.execute(sql).fetchall())
+            timings.append((time.perf_counter() - started) * 1000)
+            conn.rollback()
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + _compile(build(rng)))]
+        timings.sort()
+        results.append({
+            "query": name,
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(timings[-1], 3),
+            "rows": rows,
+            "plan": plan,
+        })
+    conn.close()
+    return results
+
+
+def print_report(size: int, results: List[Dict[str, Any]]) -> None:
+    print(f"\n== {size:,} ProvinceTarget rows ==")
+    for r in results:
+        print(f"{r['query']:<42} median={r['median_ms']:>9.3f}ms max={r['max_ms']:>9.3f}ms rows={r['rows']}")
+        for step in r["plan"]:
+            # SCAN ทั้งตาราง หรือ TEMP B-TREE คือสัญญาณว่าขาด index
+            flag = "  !!" if step.startswith("SCAN") or "TEMP B-TREE" in step else "    "
+            print(f"{flag}  {step}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="create one SQLite file with synthetic data")
+    gen.add_argument("--db", required=True)
+    gen.add_argument("--targets", type=int, default=10_000, help="number of ProvinceTarget rows")
+    gen.add_argument("--users", type=int, help="minimum number of users (default: as many as the selections need)")
+    gen.add_argument("--provinces", type=int, default=77)
+    gen.add_argument("--seed", type=int, default=1)
+
+    rep = sub.add_parser("report", help="time key queries and print EXPLAIN QUERY PLAN at several sizes")
+    rep.add_argument("--sizes", default="10000,1000000,10000000", help="comma separated ProvinceTarget counts")
+    rep.add_argument("--workdir", default=".", help="where data-<size>.db files are kept")
+    rep.add_argument("--regenerate", action="store_true", help="recreate files that already exist")
+    rep.add_argument("--repeat", type=int, default=20, help="runs per query")
+    rep.add_argument("--provinces", type=int, default=77)
+    rep.add_argument("--seed", type=int, default=1)
+    rep.add_argument("--json", help="also write results here")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        print(json.dumps(generate(Path(args.db), args.targets, args.users, args.provinces, args.seed)))
+        return 0
+
+    output = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        db_path = Path(args.workdir) / f"data-{size}.db"
+        if args.regenerate or not db_path.exists():
+            info = generate(db_path, size, None, args.provinces, args.seed)
+            print(f"generated {db_path} in {info['seconds']}s", file=sys.stderr)
+        results = report_one(db_path, args.repeat, args.seed)
+        print_report(size, results)
+        output.append({"size": size, "queries": results})
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(output, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
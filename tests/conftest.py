@@ -4,3 +4,17 @@ import sys, os
 # เอาโฟลเดอร์โปรเจกต์ (parent ของ tests/) เข้า sys.path
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, ROOT_DIR)
+
+import pytest
+
+# bcrypt cost ต่ำสุด เพื่อให้เทสเร็ว (ต้องตั้งก่อน import app)
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from app.services.province_catalog import province_catalog
+
+# แต่ละไฟล์เทสใช้ in-memory DB ของตัวเอง จึงต้องล้าง catalog ในหน่วยความจำทุกเทส
+@pytest.fixture(autouse=True)
+def reset_province_catalog():
+    province_catalog.invalidate()
+    yield
+    province_catalog.invalidate()
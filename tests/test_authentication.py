@@ -12,7 +12,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 
 # 1) use SQLModel’s async engine
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -48,7 +48,8 @@ async def async_session():
 
 @pytest.fixture(autouse=True)
 def override_get_session(async_session):
-    app.dependency_overrides[get_session] = lambda: async_session
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
     yield
     app.dependency_overrides.clear()
 
@@ -81,3 +82,179 @@ async def test_register_and_login(async_session):
         )
         assert resp3.status_code == status.HTTP_401_UNAUTHORIZED
         assert resp3.json()["detail"] == "Invalid credentials"
+
+@pytest.mark.anyio
+async def test_unknown_username_still_verifies(async_session, monkeypatch):
+    from app.services import passwords
+
+    verified = []
+    original = passwords._context.verify
+
+    def record(password, hashed):
+        verified.append(hashed)
+        return original(password, hashed)
+
+    monkeypatch.setattr(passwords._context, "verify", record)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "no-such-user", "password": "secret"},
+        )
+    assert resp.status_code == status.HTTP_401_UNAUTHORIZED
+    assert resp.json()["detail"] == "Invalid credentials"
+    # ตรวจกับ hash หลอกที่ cost เท่าของจริง เวลาตอบจึงไม่บอกว่า username มีอยู่หรือไม่
+    assert verified == [passwords._dummy_hash()]
+
+@pytest.mark.anyio
+async def test_deleted_user_token_rejected(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {
+            "username": "cacheduser",
+            "password": "secret",
+            "phone": "0811111111",
+        }
+        resp = await ac.post("/v1/authentication/register", json=payload)
+        assert resp.status_code == status.HTTP_201_CREATED
+        user_id = resp.json()["id"]
+
+        resp2 = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "cacheduser", "password": "secret"},
+        )
+        headers = {"Authorization": f"Bearer {resp2.json()['access_token']}"}
+
+        # first call loads the user, second one is served from the auth cache
+        for _ in range(2):
+            r = await ac.get("/v1/users/", headers=headers)
+            assert r.status_code == status.HTTP_200_OK
+
+        # deleting the user must evict the cached entry
+        r_del = await ac.delete(f"/v1/users/{user_id}", headers=headers)
+        assert r_del.status_code == status.HTTP_204_NO_CONTENT
+
+        r_after = await ac.get("/v1/users/", headers=headers)
+        assert r_after.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.anyio
+async def test_stateless_token_revoked_on_password_change(async_session, monkeypatch):
+    from jose import jwt
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "auth_stateless", True)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        payload = {
+            "username": "statelessuser",
+            "password": "secret",
+            "phone": "0822222222",
+        }
+        resp = await ac.post("/v1/authentication/register", json=payload)
+        user_id = resp.json()["id"]
+
+        resp2 = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "statelessuser", "password": "secret"},
+        )
+        token = resp2.json()["access_token"]
+        claims = jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
+        assert claims["uid"] == user_id
+        assert claims["token_version"] == 0
+        assert "exp" in claims and "iat" in claims
+        headers = {"Authorization": f"Bearer {token}"}
+
+        r = await ac.get("/v1/profile/selections/", headers=headers)
+        assert r.status_code == status.HTTP_200_OK
+
+        r_patch = await ac.patch(
+            f"/v1/users/{user_id}", json={"password": "changed"}, headers=headers
+        )
+        assert r_patch.status_code == status.HTTP_200_OK
+
+        r_old = await ac.get("/v1/profile/selections/", headers=headers)
+        assert r_old.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.anyio
+async def test_stateless_token_not_reused_by_new_user_with_same_id(async_session, monkeypatch):
+    from app.core.config import settings
+    from app.core.security import token_versions
+
+    monkeypatch.setattr(settings, "auth_stateless", True)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        alice = (await ac.post("/v1/authentication/register", json={
+            "username": "reuse-alice", "password": "secret", "phone": "0866666666",
+        })).json()
+        login = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "reuse-alice", "password": "secret"},
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert (await ac.get("/v1/profile/selections/", headers=headers)).status_code == status.HTTP_200_OK
+
+        r_del = await ac.delete(f"/v1/users/{alice['id']}", headers=headers)
+        assert r_del.status_code == status.HTTP_204_NO_CONTENT
+
+        # SQLite ให้ id สูงสุดที่ถูกลบกับผู้ใช้ใหม่ token_version ก็เริ่มที่ 0 เหมือนกัน
+        bob = (await ac.post("/v1/authentication/register", json={
+            "username": "reuse-bob", "password": "secret", "phone": "0855555555",
+        })).json()
+        assert bob["id"] == alice["id"]
+
+        r_old = await ac.get("/v1/profile/selections/", headers=headers)
+        assert r_old.status_code == status.HTTP_401_UNAUTHORIZED
+        # เช่นเดียวกันเมื่อค่ามาจาก cache (เช่น process อื่นที่ยังไม่รู้ว่ามีการลบ)
+        token_versions.set(bob["id"], (0, "reuse-bob"))
+        r_cached = await ac.get("/v1/profile/selections/", headers=headers)
+        assert r_cached.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.anyio
+async def test_login_upgrades_legacy_hash(async_session):
+    from app.models.user_model import User
+
+    legacy = User(username="legacyuser", phone="0833333333", hashed_password="oldpass_notreallyhashed")
+    async_session.add(legacy)
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        bad = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "legacyuser", "password": "wrong"},
+        )
+        assert bad.status_code == status.HTTP_401_UNAUTHORIZED
+
+        ok = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "legacyuser", "password": "oldpass"},
+        )
+        assert ok.status_code == status.HTTP_200_OK
+
+        await async_session.refresh(legacy)
+        assert legacy.hashed_password.startswith("$2b$")
+
+        # the upgraded hash keeps working
+        again = await ac.post(
+            "/v1/authentication/login",
+            data={"username": "legacyuser", "password": "oldpass"},
+        )
+        assert again.status_code == status.HTTP_200_OK
+
+@pytest.mark.anyio
+async def test_register_conflict_names_field(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        base = {"username": "dupcheck", "password": "secret", "phone": "0844444444", "email": "dup@example.com"}
+        r = await ac.post("/v1/authentication/register", json=base)
+        assert r.status_code == status.HTTP_201_CREATED
+
+        cases = [
+            ({**base, "phone": "0844444445", "email": None}, "username"),
+            ({**base, "username": "other1", "email": None}, "phone"),
+            ({**base, "username": "other2", "phone": "0844444446"}, "email"),
+        ]
+        for payload, field in cases:
+            r_dup = await ac.post("/v1/authentication/register", json=payload)
+            assert r_dup.status_code == status.HTTP_409_CONFLICT
+            assert r_dup.json()["detail"] == f"{field} already registered"
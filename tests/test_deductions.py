@@ -0,0 +1,118 @@
+# tests/test_deductions.py
+
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from fastapi import status
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import get_read_session, get_write_session
+from app.core.security import get_current_principal, Principal
+from app.models.user_model import User
+from app.models.province_model import Province
+from app.models.province_target_model import ProvinceTarget
+from app.routers.v1.deduction_router import router as deduction_router
+
+# Mount the deduction router
+@pytest.fixture(autouse=True, scope="session")
+def include_deduction_router():
+    app.include_router(deduction_router)
+    yield
+
+# Mock authentication
+@pytest.fixture(autouse=True)
+def override_auth():
+    app.dependency_overrides[get_current_principal] = lambda: Principal(id=1, username="traveller")
+    yield
+    app.dependency_overrides.pop(get_current_principal, None)
+
+# In-memory DB setup
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(TEST_DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest.fixture(autouse=True, scope="module")
+async def setup_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+
+@pytest.fixture
+async def async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+@pytest.fixture(autouse=True)
+def override_session(async_session):
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
+    yield
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides.pop(dep, None)
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+BASE = "/profile/deductions"
+
+@pytest.fixture
+async def seeded(async_session, request):
+    tag = request.node.name
+    me = User(username=f"{tag}-me", phone=f"{tag}-1", hashed_password="x")
+    other = User(username=f"{tag}-other", phone=f"{tag}-2", hashed_password="x")
+    primary = Province(name="ภูเก็ต", category="primary", discount_bp=1000, is_primary=True, is_secondary=False)
+    secondary = Province(name="น่าน", category="secondary", discount_bp=1000, is_primary=False, is_secondary=True)
+    async_session.add_all([me, other, primary, secondary])
+    await async_session.commit()
+    async_session.add_all([
+        ProvinceTarget(user_id=me.id, province_id=primary.id),
+        ProvinceTarget(user_id=me.id, province_id=secondary.id),
+        ProvinceTarget(user_id=other.id, province_id=secondary.id),
+    ])
+    await async_session.commit()
+    app.dependency_overrides[get_current_principal] = lambda: Principal(id=me.id, username=me.username)
+    return me, other, primary, secondary
+
+@pytest.mark.anyio
+async def test_my_deductions(seeded):
+    _, _, primary, secondary = seeded
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.get(f"{BASE}/", params={"amount": "1000"})
+        assert r.status_code == status.HTTP_200_OK
+        body = r.json()
+        by_province = {i["province_id"]: Decimal(i["deduction"]) for i in body["items"]}
+        # เมืองรองได้ตัวคูณ 1.5 เท่า
+        assert by_province == {primary.id: Decimal("100"), secondary.id: Decimal("150")}
+        assert Decimal(body["spend_total"]) == Decimal("2000")
+        assert Decimal(body["deduction_total"]) == Decimal("250")
+
+        r = await client.get(f"{BASE}/", params={"spend": [f"{secondary.id}:333.33"]})
+        items = {i["province_id"]: Decimal(i["deduction"]) for i in r.json()["items"]}
+        assert items == {primary.id: Decimal("0"), secondary.id: Decimal("50.00")}
+
+        bad = await client.get(f"{BASE}/", params={"spend": "oops"})
+        assert bad.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@pytest.mark.anyio
+async def test_batch_deductions(seeded):
+    me, other, _, _ = seeded
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"{BASE}/batch", json={"user_ids": [other.id, me.id, 99999], "amount": "100"})
+        assert r.status_code == status.HTTP_200_OK
+        summaries = r.json()
+        assert [s["user_id"] for s in summaries] == [other.id, me.id, 99999]
+        assert [Decimal(s["deduction_total"]) for s in summaries] == [Decimal("15"), Decimal("25"), Decimal("0")]
+        assert summaries[2]["items"] == []
@@ -0,0 +1,101 @@
+# tests/test_exports.py
+
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from fastapi import status
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.database import get_read_session, get_read_session_factory, get_write_session
+from app.core.security import get_current_user
+from app.models.user_model import User
+from app.models.province_model import Province
+from app.models.province_target_model import ProvinceTarget
+from app.routers.v1.export_router import router as export_router
+
+# Mount the export router
+@pytest.fixture(autouse=True, scope="session")
+def include_export_router():
+    app.include_router(export_router)
+    yield
+
+# Mock authentication
+@pytest.fixture(autouse=True)
+def override_auth():
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, username="analyst")
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+# In-memory DB setup
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(TEST_DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest.fixture(autouse=True, scope="module")
+async def setup_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+
+@pytest.fixture
+async def async_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+@pytest.fixture(autouse=True)
+def override_session(async_session):
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
+    app.dependency_overrides[get_read_session_factory] = lambda: AsyncSessionLocal
+    yield
+    app.dependency_overrides.pop(get_read_session_factory, None)
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides.pop(dep, None)
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+BASE = "/export"
+
+@pytest.mark.anyio
+async def test_export_ndjson_and_csv(async_session):
+    users = [User(username=f"u{i}", phone=f"08{i:08d}", hashed_password="x") for i in range(3)]
+    province = Province(name="น่าน", category="secondary", discount_bp=1500, is_primary=False, is_secondary=True)
+    async_session.add_all([*users, province])
+    await async_session.commit()
+    async_session.add_all([ProvinceTarget(user_id=u.id, province_id=province.id) for u in users])
+    await async_session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r_users = await client.get(f"{BASE}/users")
+        assert r_users.status_code == status.HTTP_200_OK
+        assert r_users.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r_users.text.splitlines()]
+        assert [u["username"] for u in lines] == ["u0", "u1", "u2"]
+        assert "hashed_password" not in lines[0]
+
+        r_sel = await client.get(f"{BASE}/selections", params={"format": "csv"})
+        assert r_sel.status_code == status.HTTP_200_OK
+        assert r_sel.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(r_sel.text)))
+        assert len(rows) == 3
+        assert {r["username"] for r in rows} == {"u0", "u1", "u2"}
+        assert all(r["province_name"] == "น่าน" and r["discount_rate"] == "15%" for r in rows)
+        assert all(r["selected_at"] for r in rows)
+
+        r_prov = await client.get(f"{BASE}/provinces")
+        assert [p["name"] for p in map(json.loads, r_prov.text.splitlines())] == ["น่าน"]
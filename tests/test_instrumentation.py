@@ -0,0 +1,56 @@
+# tests/test_instrumentation.py
+
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import json
+import logging
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.instrumentation import RequestStatsMiddleware, instrument_engine
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.mark.anyio
+async def test_request_stats_header_and_log(monkeypatch, caplog):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    instrument_engine(engine)  # เรียกซ้ำต้องไม่นับซ้ำ
+    monkeypatch.setattr(settings, "request_query_threshold", 2)
+
+    app = FastAPI()
+    app.add_middleware(RequestStatsMiddleware)
+
+    @app.get("/queries/{count}")
+    async def run_queries(count: int):
+        async with engine.connect() as conn:
+            for _ in range(count):
+                await conn.execute(text("SELECT 1"))
+        return {"count": count}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        with caplog.at_level(logging.INFO, logger="app.request"):
+            many = await client.get("/queries/3")
+            few = await client.get("/queries/1")
+    await engine.dispose()
+
+    assert many.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="3 queries"' in many.headers["Server-Timing"]
+    assert 'desc="1 queries"' in few.headers["Server-Timing"]
+
+    records = [rec for rec in caplog.records if rec.name == "app.request"]
+    logged = [json.loads(rec.getMessage()) for rec in records]
+    assert [(rec["route"], rec["queries"], rec["too_many_queries"]) for rec in logged] == [
+        ("/queries/{count}", 3, True),
+        ("/queries/{count}", 1, False),
+    ]
+    assert [rec.levelno for rec in records] == [logging.WARNING, logging.INFO]
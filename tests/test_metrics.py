@@ -0,0 +1,53 @@
+# tests/test_metrics.py
+
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from fastapi import FastAPI, HTTPException
+
+from app.core.cache import TTLCache
+from app.core.metrics import MetricsRegistry, install_metrics
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.mark.anyio
+async def test_metrics_per_route_template():
+    registry = MetricsRegistry()
+    cache: TTLCache[int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(404, "nope")
+        return {"id": item_id}
+
+    install_metrics(app, caches={"demo": cache}, registry=registry)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        for item_id in (1, 2, 0):
+            await client.get(f"/items/{item_id}")
+        await client.get("/not-a-route")
+        r = await client.get("/metrics")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in body
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="404"} 1' in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/items/{item_id}",le="+Inf"} 3' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 3' in body
+    # /metrics เองยังไม่จบตอน render
+    assert 'http_requests_in_flight{method="GET"} 1' in body
+    assert 'cache_hits_total{cache="demo"} 1' in body
+    assert 'cache_hit_ratio{cache="demo"} 0.5' in body
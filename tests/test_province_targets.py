@@ -12,8 +12,8 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_session
-from app.core.security import get_current_user
+from app.database import get_read_session, get_write_session
+from app.core.security import get_current_user, get_current_principal, Principal
 from app.models.user_model import User
 from app.models.province_model import Province
 from app.models.province_target_model import ProvinceTarget
@@ -30,8 +30,10 @@ def include_target_router():
 @pytest.fixture(autouse=True)
 def override_auth():
     app.dependency_overrides[get_current_user] = lambda: User(id=1, username="tester")
+    app.dependency_overrides[get_current_principal] = lambda: Principal(id=1, username="tester")
     yield
     app.dependency_overrides.pop(get_current_user, None)
+    app.dependency_overrides.pop(get_current_principal, None)
 
 # In-memory DB setup
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -53,9 +55,11 @@ async def async_session():
 
 @pytest.fixture(autouse=True)
 def override_session(async_session):
-    app.dependency_overrides[get_session] = lambda: async_session
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
     yield
-    app.dependency_overrides.pop(get_session, None)
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides.pop(dep, None)
 
 @pytest.fixture(scope="module")
 def anyio_backend():
@@ -66,7 +70,7 @@ BASE = "/profile/selections"
 @ pytest.mark.anyio
 async def test_selection_crud(async_session):
     # Pre-seed a province in DB
-    province = Province(name="TestProv", category="primary", discount_rate="0%", is_primary=True, is_secondary=False)
+    province = Province(name="TestProv", category="primary", discount_bp=0, is_primary=True, is_secondary=False)
     async_session.add(province)
     await async_session.commit()
     await async_session.refresh(province)
@@ -96,3 +100,208 @@ async def test_selection_crud(async_session):
         r4 = await client.get(f"{BASE}/")
         assert r4.status_code == status.HTTP_200_OK
         assert not r4.json()
+
+@pytest.mark.anyio
+async def test_list_selections_query_count_is_constant(async_session):
+    from sqlalchemy import event
+
+    provinces = [
+        Province(name=f"Prov{i}", category="secondary", discount_bp=500, is_primary=False, is_secondary=True)
+        for i in range(5)
+    ]
+    async_session.add_all(provinces)
+    await async_session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        counts = []
+        for prov in provinces:
+            r = await client.post(f"{BASE}/", json={"province_id": prov.id})
+            assert r.status_code == status.HTTP_201_CREATED
+
+            statements.clear()
+            event.listen(engine.sync_engine, "before_cursor_execute", count)
+            try:
+                r_list = await client.get(f"{BASE}/")
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", count)
+            assert r_list.status_code == status.HTTP_200_OK
+            counts.append(len(statements))
+
+        assert len(r_list.json()) == len(provinces)
+        # 1 selection or 5 selections: same number of queries
+        assert counts == [1] * len(provinces)
+
+@pytest.mark.anyio
+async def test_group_commit_selections(async_session, monkeypatch):
+    import asyncio
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.services.group_commit import selection_coalescer
+
+    monkeypatch.setattr(settings, "selection_group_commit", True)
+    monkeypatch.setattr(selection_coalescer, "session_factory", AsyncSessionLocal)
+    monkeypatch.setattr(selection_coalescer, "window", 0.2)
+
+    provinces = [
+        Province(name=f"GroupProv{i}", category="secondary", discount_bp=500, is_primary=False, is_secondary=True)
+        for i in range(8)
+    ]
+    async_session.add_all(provinces)
+    await async_session.commit()
+
+    inserts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO provincetarget"):
+            inserts.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            responses = await asyncio.gather(*[
+                client.post(f"{BASE}/", json={"province_id": prov.id}) for prov in provinces
+            ])
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+        assert [r.status_code for r in responses] == [status.HTTP_201_CREATED] * 8
+        ids = {r.json()["id"] for r in responses}
+        assert len(ids) == 8
+        assert [r.json()["province_name"] for r in responses] == [p.name for p in provinces]
+        assert len(inserts) == 1
+
+        # validation still happens per request
+        missing = await client.post(f"{BASE}/", json={"province_id": 999999})
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.anyio
+async def test_group_commit_with_read_write_split(tmp_path, monkeypatch):
+    import asyncio
+    from app.core.config import settings
+    from dataclasses import replace
+    from app.database import ENGINE_PROFILES, create_engine_for_profile, read_only_url
+    from app.services.group_commit import selection_coalescer
+    from app.services.province_catalog import province_catalog
+
+    # แบบเดียวกับ app.database เมื่อเปิด db_read_write_split: ตัวเขียนมี connection เดียว
+    url = f"sqlite+aiosqlite:///{tmp_path / 'split.db'}"
+    profile = ENGINE_PROFILES["production"]
+    writer = create_engine_for_profile(url, profile, pool_size=1, max_overflow=0, pool_timeout=2)
+    reader = create_engine_for_profile(read_only_url(url), replace(profile, journal_mode=None))
+    WriteSession = sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+    ReadSession = sessionmaker(reader, class_=AsyncSession, expire_on_commit=False)
+    async with writer.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with WriteSession() as session:
+        prov = Province(name="SplitProv", category="primary", is_primary=True)
+        session.add(prov)
+        await session.commit()
+
+    async def write_session():
+        async with WriteSession() as session:
+            yield session
+
+    async def read_session():
+        async with ReadSession() as session:
+            yield session
+
+    monkeypatch.setattr(settings, "db_read_write_split", True)
+    monkeypatch.setattr(settings, "selection_group_commit", True)
+    monkeypatch.setattr(selection_coalescer, "session_factory", WriteSession)
+    app.dependency_overrides[get_write_session] = write_session
+    app.dependency_overrides[get_read_session] = read_session
+    province_catalog.invalidate()  # catalog เย็น: request แรกต้องโหลดจาก DB
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await asyncio.wait_for(client.post(f"{BASE}/", json={"province_id": prov.id}), 10)
+        assert r.status_code == status.HTTP_201_CREATED
+        assert r.json()["province_name"] == "SplitProv"
+    finally:
+        province_catalog.invalidate()
+        await writer.dispose()
+        await reader.dispose()
+
+@pytest.mark.anyio
+async def test_selection_is_idempotent_and_batchable(async_session):
+    provinces = [
+        Province(name=f"BatchProv{i}", category="primary", discount_bp=0, is_primary=True, is_secondary=False)
+        for i in range(3)
+    ]
+    async_session.add_all(provinces)
+    await async_session.commit()
+    ids = [p.id for p in provinces]
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post(f"{BASE}/", json={"province_id": ids[0]})
+        assert first.status_code == status.HTTP_201_CREATED
+        retry = await client.post(f"{BASE}/", json={"province_id": ids[0]})
+        assert retry.status_code == status.HTTP_200_OK
+        assert retry.json()["id"] == first.json()["id"]
+
+        batch = await client.post(f"{BASE}/batch", json={"province_ids": ids + [ids[1]]})
+        assert batch.status_code == status.HTTP_200_OK
+        rows = batch.json()
+        assert [r["province_id"] for r in rows] == ids
+        assert rows[0]["id"] == first.json()["id"]
+
+        again = await client.post(f"{BASE}/batch", json={"province_ids": ids})
+        assert [r["id"] for r in again.json()] == [r["id"] for r in rows]
+
+        missing = await client.post(f"{BASE}/batch", json={"province_ids": [ids[0], 999999]})
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+        listed = [r["province_id"] for r in (await client.get(f"{BASE}/")).json()]
+        assert sorted(pid for pid in listed if pid in ids) == sorted(ids)
+
+@pytest.mark.anyio
+async def test_selection_counts_follow_writes(async_session):
+    from sqlalchemy import update
+    from sqlmodel import select
+    from app.services.popularity import reconcile_selection_counts
+    from app.services.province_catalog import province_catalog
+
+    provinces = [
+        Province(name=f"PopProv{i}", category="primary", discount_bp=0, is_primary=True, is_secondary=False)
+        for i in range(2)
+    ]
+    async_session.add_all(provinces)
+    await async_session.commit()
+    a, b = [p.id for p in provinces]
+
+    async def db_counts():
+        rows = await async_session.exec(
+            select(Province.id, Province.selection_count).where(Province.id.in_([a, b]))
+        )
+        return dict(rows.all())
+
+    async def catalog_counts():
+        snapshot = await province_catalog.snapshot(async_session)
+        return {pid: snapshot.by_id[pid].selection_count for pid in (a, b)}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post(f"{BASE}/", json={"province_id": a})
+        await client.post(f"{BASE}/", json={"province_id": a})  # retry ไม่นับซ้ำ
+        await client.post(f"{BASE}/batch", json={"province_ids": [a, b, b]})
+        assert await db_counts() == {a: 1, b: 1}
+        assert await catalog_counts() == {a: 1, b: 1}
+
+        await client.delete(f"{BASE}/{first.json()['id']}")
+        assert await db_counts() == {a: 0, b: 1}
+        assert await catalog_counts() == {a: 0, b: 1}
+
+    # ค่าคลาดเคลื่อนถูกแก้โดย reconcile
+    await async_session.exec(update(Province).where(Province.id == b).values(selection_count=42))
+    await async_session.commit()
+    assert await reconcile_selection_counts(async_session) >= 1
+    assert await db_counts() == {a: 0, b: 1}
+    assert await catalog_counts() == {a: 0, b: 1}
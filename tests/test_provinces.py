@@ -12,7 +12,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.core.security import get_current_user
 from app.models.user_model import User
 from app.routers.v1.province_router import router as provinces_router
@@ -56,9 +56,11 @@ async def async_session():
 
 @pytest.fixture(autouse=True)
 def override_session(async_session):
-    app.dependency_overrides[get_session] = lambda: async_session
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
     yield
-    app.dependency_overrides.pop(get_session, None)
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides.pop(dep, None)
 
 @pytest.fixture(scope="module")
 def anyio_backend():
@@ -126,3 +128,359 @@ async def test_crud_province(async_session):
         # 9) Confirm deletion
         r9 = await client.get(f"{BASE}/{pid}")
         assert r9.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.anyio
+async def test_list_provinces_cursor_pagination(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        batch = [
+            {"name": f"จังหวัด{i}", "category": "secondary", "discount_rate": "5%"}
+            for i in range(5)
+        ]
+        r = await client.post(f"{BASE}/", json=batch)
+        assert r.status_code == status.HTTP_201_CREATED
+
+        seen = []
+        after = 0
+        while True:
+            page = await client.get(f"{BASE}/", params={"after": after, "limit": 2})
+            assert page.status_code == status.HTTP_200_OK
+            items = page.json()
+            assert len(items) <= 2
+            seen.extend(p["id"] for p in items)
+            if "X-Next-Cursor" not in page.headers:
+                break
+            assert 'rel="next"' in page.headers["Link"]
+            after = int(page.headers["X-Next-Cursor"])
+
+        # plain list (compat mode) returns the same rows in the same order
+        full = await client.get(f"{BASE}/")
+        assert seen == [p["id"] for p in full.json()]
+        assert "Link" not in full.headers
+
+@pytest.mark.anyio
+async def test_reads_served_from_catalog(async_session):
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"{BASE}/", json={"name": "ภูเก็ต", "category": "primary", "discount_rate": "10%"})
+        pid = r.json()["id"]
+        await client.get(f"{BASE}/")  # loads the snapshot
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            r_list = await client.get(f"{BASE}/")
+            r_one = await client.get(f"{BASE}/{pid}")
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+        assert r_list.status_code == status.HTTP_200_OK
+        assert r_one.json()["name"] == "ภูเก็ต"
+        assert statements == []
+
+        # writes swap the snapshot so reads see them immediately
+        r_patch = await client.patch(f"{BASE}/{pid}", json={"name": "Phuket"})
+        assert r_patch.status_code == status.HTTP_200_OK
+        r_again = await client.get(f"{BASE}/{pid}")
+        assert r_again.json()["name"] == "Phuket"
+
+@pytest.mark.anyio
+async def test_conditional_get_returns_304(async_session):
+    from app.services.province_catalog import province_catalog
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"{BASE}/", json={"name": "สงขลา", "category": "secondary", "discount_rate": "15%"})
+        pid = r.json()["id"]
+
+        for url in (f"{BASE}/", f"{BASE}/{pid}"):
+            first = await client.get(url)
+            assert first.status_code == status.HTTP_200_OK
+            etag = first.headers["ETag"]
+            assert "Cache-Control" in first.headers
+
+            cached = await client.get(url, headers={"If-None-Match": etag})
+            assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+            assert cached.headers["ETag"] == etag
+            assert cached.content == b""
+
+            # body มี selection_count ด้วย เมื่อ count เปลี่ยน ETag ต้องเปลี่ยนตาม
+            province_catalog.apply_counts({pid: 1})
+            counted = await client.get(url, headers={"If-None-Match": etag})
+            assert counted.status_code == status.HTTP_200_OK
+            assert counted.headers["ETag"] != etag
+            etag = counted.headers["ETag"]
+
+        # any write bumps the catalog version
+        await client.patch(f"{BASE}/{pid}", json={"discount_rate": "20%"})
+        changed = await client.get(f"{BASE}/{pid}", headers={"If-None-Match": etag})
+        assert changed.status_code == status.HTTP_200_OK
+        assert changed.headers["ETag"] != etag
+
+@pytest.mark.anyio
+async def test_province_changes_delta(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"{BASE}/", json=[
+            {"name": "ตรัง", "category": "secondary", "discount_rate": "15%"},
+            {"name": "สตูล", "category": "secondary", "discount_rate": "15%"},
+        ])
+        trang, satun = r.json()
+        # one batch insert, one change version
+        assert satun["version"] == trang["version"]
+
+        full = await client.get(f"{BASE}/changes", params={"since": 0})
+        assert full.status_code == status.HTTP_200_OK
+        since = full.json()["version"]
+        assert since >= satun["version"]
+
+        nothing = await client.get(f"{BASE}/changes", params={"since": since})
+        assert nothing.json() == {"version": since, "upserts": [], "deleted": []}
+
+        await client.patch(f"{BASE}/{trang['id']}", json={"discount_rate": "20%"})
+        await client.delete(f"{BASE}/{satun['id']}")
+
+        delta = (await client.get(f"{BASE}/changes", params={"since": since})).json()
+        assert [p["id"] for p in delta["upserts"]] == [trang["id"]]
+        assert delta["upserts"][0]["discount_rate"] == "20%"
+        assert delta["deleted"] == [satun["id"]]
+        assert delta["version"] > since
+
+        # tombstoned provinces are gone from regular reads and writes
+        assert (await client.get(f"{BASE}/{satun['id']}")).status_code == status.HTTP_404_NOT_FOUND
+        assert (await client.patch(f"{BASE}/{satun['id']}", json={"name": "x"})).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.anyio
+async def test_bulk_create_single_transaction(async_session):
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        batch = [
+            {"name": f"batch{i}", "category": "primary", "discount_rate": "1%"}
+            for i in range(50)
+        ]
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            r = await client.post(f"{BASE}/", json=batch)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        assert r.status_code == status.HTTP_201_CREATED
+        created = r.json()
+        assert [p["name"] for p in created] == [p["name"] for p in batch]
+        assert all(p["id"] for p in created)
+        # INSERT เดียวทั้ง batch ผลเรียงตาม input และได้ version เดียวกัน
+        assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) == 1
+        assert [p["id"] for p in created] == sorted(p["id"] for p in created)
+        assert len({p["version"] for p in created}) == 1
+
+        # per-item validation errors, nothing inserted
+        bad = [
+            {"name": "ok", "category": "primary", "discount_rate": "1%"},
+            {"name": "bad-rate", "category": "primary", "discount_rate": "10"},
+            {"name": "bad-category", "category": "nope"},
+        ]
+        r_bad = await client.post(f"{BASE}/", json=bad)
+        assert r_bad.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        locs = [tuple(e["loc"][:3]) for e in r_bad.json()["detail"]]
+        assert locs == [("body", "items", 1), ("body", "items", 2)]
+        names = [p["name"] for p in (await client.get(f"{BASE}/")).json()]
+        assert "ok" not in names
+
+@pytest.mark.anyio
+async def test_import_provinces_ndjson_and_csv(async_session, monkeypatch):
+    import json
+    from sqlalchemy import event
+    from sqlmodel import select
+    from app.core.config import settings
+    from app.models.province_model import Province
+    # app.routers.v1 export ชื่อ province_router เป็นตัว APIRouter จึงหยิบ module จาก sys.modules
+    province_router = sys.modules["app.routers.v1.province_router"]
+
+    async def names_in_db(prefix):
+        async with AsyncSessionLocal() as session:
+            result = await session.exec(
+                select(Province.name).where(Province.name.startswith(prefix)).order_by(Province.id)
+            )
+            return result.all()
+
+    monkeypatch.setattr(settings, "import_batch_size", 2)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        rows = [
+            {"name": "imp-a", "category": "primary", "discount_rate": "5%"},
+            {"name": "imp-b", "category": "secondary", "discount_rate": "10%"},
+            {"name": "imp-bad", "category": "primary", "discount_rate": "10"},  # ไม่มี %
+            {"name": "imp-c", "category": "primary", "discount_rate": "1%"},
+            {"name": "imp-d", "category": "primary", "discount_rate": "2%"},
+            {"name": "imp-e", "category": "secondary", "discount_rate": "3%"},
+        ]
+        lines = [json.dumps(r) for r in rows]
+        lines.insert(3, "{not json")
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            r = await client.post(
+                f"{BASE}/import",
+                content="\n".join(lines).encode(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        assert r.status_code == status.HTTP_200_OK
+        summary = r.json()
+        assert summary["inserted"] == 5
+        assert summary["failed"] == 2
+        assert [e["line"] for e in summary["errors"]] == [3, 4]
+        assert summary["errors"][1]["errors"][0].startswith("invalid JSON")
+        # 5 แถวที่ผ่าน batch ละ 2 แถว = 3 batch, batch ละ INSERT เดียว
+        assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) == 3
+        assert await names_in_db("imp-") == ["imp-a", "imp-b", "imp-c", "imp-d", "imp-e"]
+
+        csv_body = "name,category,discount_rate\ncsv-a,primary,5%\ncsv-b,nope,5%\ncsv-c,secondary,7.5%\n"
+        r_csv = await client.post(
+            f"{BASE}/import",
+            content=csv_body.encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+        assert r_csv.json()["inserted"] == 2
+        # บรรทัดที่ 1 ของ CSV คือ header
+        assert [e["line"] for e in r_csv.json()["errors"]] == [3]
+        assert await names_in_db("csv-") == ["csv-a", "csv-c"]
+
+        # batch ที่ commit ไปแล้วยังอยู่ แม้ batch หลังจะล้ม
+        original = province_router._insert_provinces
+        calls = []
+
+        async def fail_second_batch(session, items):
+            calls.append(len(items))
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            return await original(session, items)
+
+        monkeypatch.setattr(province_router, "_insert_provinces", fail_second_batch)
+        body = "\n".join(
+            json.dumps({"name": f"part-{i}", "category": "primary", "discount_rate": "1%"})
+            for i in range(4)
+        )
+        with pytest.raises(RuntimeError):
+            await client.post(
+                f"{BASE}/import",
+                content=body.encode(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+        assert await names_in_db("part-") == ["part-0", "part-1"]
+
+@pytest.mark.anyio
+async def test_filter_and_sort_by_discount(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r = await client.post(f"{BASE}/", json=[
+            {"name": "ลำปาง", "category": "secondary", "discount_rate": "12.5%"},
+            {"name": "ลำพูน", "category": "secondary", "discount_rate": "30%"},
+            {"name": "แพร่", "category": "secondary", "discount_rate": "2%"},
+            {"name": "พะเยา", "category": "primary", "discount_rate": "40%"},
+        ])
+        assert r.status_code == status.HTTP_201_CREATED
+        assert r.json()[0]["discount_rate"] == "12.5%"
+        assert r.json()[0]["discount_bp"] == 1250
+
+        r = await client.get(
+            f"{BASE}/",
+            params={"category": "secondary", "min_discount": 10, "sort": "-discount"},
+        )
+        assert r.status_code == status.HTTP_200_OK
+        rates = [p["discount_bp"] for p in r.json()]
+        assert rates == sorted(rates, reverse=True)
+        assert all(p["category"] == "secondary" and p["discount_bp"] >= 1000 for p in r.json())
+        names = [p["name"] for p in r.json()]
+        assert "แพร่" not in names and "พะเยา" not in names
+        assert names.index("ลำพูน") < names.index("ลำปาง")
+
+        r = await client.get(f"{BASE}/", params={"sort": "discount", "after": 1})
+        assert r.status_code == status.HTTP_400_BAD_REQUEST
+
+        r = await client.post(f"{BASE}/", json={"name": "x", "category": "primary", "discount_rate": "101%"})
+        assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@pytest.mark.anyio
+async def test_search_provinces(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.post(f"{BASE}/", json=[
+            {"name": "นครราชสีมา", "category": "secondary"},
+            {"name": "นครปฐม", "category": "secondary"},
+            {"name": "สกลนคร", "category": "secondary"},
+            {"name": "Nakhon Nayok", "category": "secondary"},
+        ])
+
+        # substring กลางคำภาษาไทย (ไม่มีช่องว่าง) และขึ้นต้นมาก่อน
+        r = await client.get(f"{BASE}/search", params={"q": "นคร"})
+        assert r.status_code == status.HTTP_200_OK
+        names = [p["name"] for p in r.json()]
+        assert set(names) >= {"นครราชสีมา", "นครปฐม", "สกลนคร"}
+        assert names.index("สกลนคร") > names.index("นครปฐม")
+
+        r = await client.get(f"{BASE}/search", params={"q": "ราชสีมา"})
+        assert [p["name"] for p in r.json()] == ["นครราชสีมา"]
+
+        # ไม่สนตัวพิมพ์/ช่องว่าง
+        r = await client.get(f"{BASE}/search", params={"q": "nakhonnay"})
+        assert [p["name"] for p in r.json()] == ["Nakhon Nayok"]
+
+        r = await client.get(f"{BASE}/search", params={"q": "zzzz"})
+        assert r.json() == []
+
+@pytest.mark.anyio
+async def test_popular_provinces(async_session):
+    from app.services.province_catalog import province_catalog
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        created = (await client.post(f"{BASE}/", json=[
+            {"name": "น้อย", "category": "primary"},
+            {"name": "นิยม", "category": "primary"},
+        ])).json()
+        first = await client.get(f"{BASE}/popular", params={"limit": 1})
+        etag = first.headers["ETag"]
+
+        province_catalog.apply_counts({created[1]["id"]: 1_000_000})
+        r = await client.get(f"{BASE}/popular", params={"limit": 1}, headers={"If-None-Match": etag})
+        assert r.status_code == status.HTTP_200_OK
+        assert [p["name"] for p in r.json()] == ["นิยม"]
+        assert r.json()[0]["selection_count"] == 1_000_000
+
+@pytest.mark.anyio
+async def test_stale_catalog_load_is_dropped(async_session):
+    from app.models.province_model import Province
+    from app.services.province_catalog import ProvinceCatalog
+
+    catalog = ProvinceCatalog()
+    await catalog.load(async_session)
+    newer = Province(id=10_001, name="ใหม่", category="primary", version=10_001)
+
+    class SlowSession:
+        # จำลอง write ที่ commit และ apply_changes ระหว่างที่ SELECT ของ load() ยังไม่กลับมา
+        async def exec(self, stmt):
+            result = await async_session.exec(stmt)
+            catalog.apply_changes([newer])
+            return result
+
+    snapshot = await catalog.load(SlowSession())
+    assert newer.id in snapshot.by_id
+    assert (await catalog.get(async_session, newer.id)).name == "ใหม่"
@@ -0,0 +1,113 @@
+# tests/test_schema_upgrade.py
+
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+import app.models.province_model  # noqa: F401  (ลงทะเบียนทุกตารางใน metadata)
+import app.models.user_model  # noqa: F401
+from app.models.schema_upgrade import upgrade_schema
+
+# schema ที่ create_all ของรุ่นแรกสร้างไว้ (ก่อนมี token_version, discount_bp, version, ...)
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL,
+    username VARCHAR NOT NULL,
+    phone VARCHAR NOT NULL,
+    email VARCHAR,
+    citizen_id VARCHAR,
+    hashed_password VARCHAR NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_user_phone ON user (phone);
+CREATE UNIQUE INDEX ix_user_citizen_id ON user (citizen_id);
+CREATE UNIQUE INDEX ix_user_email ON user (email);
+CREATE UNIQUE INDEX ix_user_username ON user (username);
+CREATE TABLE province (
+    id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    discount_rate VARCHAR NOT NULL,
+    is_primary BOOLEAN NOT NULL,
+    is_secondary BOOLEAN NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE provincetarget (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    province_id INTEGER NOT NULL,
+    selected_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id),
+    FOREIGN KEY(province_id) REFERENCES province (id)
+);
+CREATE INDEX ix_provincetarget_province_id ON provincetarget (province_id);
+CREATE INDEX ix_provincetarget_user_id ON provincetarget (user_id);
+"""
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    return "asyncio"
+
+async def _create_and_upgrade(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            return await conn.run_sync(upgrade_schema)
+    finally:
+        await engine.dispose()
+
+@pytest.mark.anyio
+async def test_upgrade_baseline_database(tmp_path):
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO user VALUES (?, ?, ?, NULL, NULL, 'x')", [(1, "a", "01"), (2, "b", "02")])
+    conn.executemany(
+        "INSERT INTO province VALUES (?, ?, 'primary', ?, 1, 0)",
+        [(1, "ภูเก็ต", "12.5%"), (2, "น่าน", "10%"), (3, "เสีย", "abc")],
+    )
+    conn.executemany(
+        "INSERT INTO provincetarget VALUES (?, ?, ?, '2025-01-01 00:00:00')",
+        [(1, 1, 1), (2, 2, 1), (3, 1, 2), (4, 1, 1)],  # แถว 4 ซ้ำกับแถว 1
+    )
+    conn.commit()
+    conn.close()
+
+    steps = await _create_and_upgrade(path)
+    assert "add column province.discount_bp" in steps
+    assert "create unique index uq_provincetarget_user_province" in steps
+
+    conn = sqlite3.connect(path)
+    provinces = conn.execute(
+        "SELECT id, discount_bp, version, deleted_at, selection_count FROM province ORDER BY id"
+    ).fetchall()
+    assert provinces == [(1, 1250, 1, None, 2), (2, 1000, 1, None, 1), (3, 0, 1, None, 0)]
+    assert conn.execute("SELECT token_version FROM user").fetchall() == [(0,), (0,)]
+    assert [r[0] for r in conn.execute("SELECT id FROM provincetarget ORDER BY id")] == [1, 2, 3]
+    # INSERT จาก model ปัจจุบันต้องผ่าน (คอลัมน์ discount_rate เดิมถูกลบไปแล้ว)
+    conn.execute(
+        "INSERT INTO province (name, category, discount_bp, is_primary, is_secondary, version, selection_count)"
+        " VALUES ('ใหม่', 'secondary', 0, 0, 1, 2, 0)"
+    )
+    conn.close()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.connect() as conn:
+        indexes = await conn.run_sync(lambda c: {i["name"] for i in inspect(c).get_indexes("province")})
+    await engine.dispose()
+    assert {"ix_province_category_discount_bp", "ix_province_selection_count", "ix_province_version"} <= indexes
+
+    # เรียกซ้ำ (startup ครั้งถัดไป) ต้องไม่ทำอะไรเพิ่ม
+    assert await _create_and_upgrade(path) == []
+
+@pytest.mark.anyio
+async def test_fresh_database_needs_no_upgrade(tmp_path):
+    assert await _create_and_upgrade(tmp_path / "fresh.db") == []
@@ -12,7 +12,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_session
+from app.database import get_read_session, get_write_session
 from app.core.security import get_current_user
 from app.models.user_model import User
 from app.routers.v1.user_router import router as users_router
@@ -56,9 +56,11 @@ async def async_session():
 
 @pytest.fixture(autouse=True)
 def override_session(async_session):
-    app.dependency_overrides[get_session] = lambda: async_session
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides[dep] = lambda: async_session
     yield
-    app.dependency_overrides.pop(get_session, None)
+    for dep in (get_read_session, get_write_session):
+        app.dependency_overrides.pop(dep, None)
 
 @pytest.fixture(scope="module")
 def anyio_backend():
@@ -86,7 +88,9 @@ async def test_user_crud(async_session):
 
         # --- Fail on duplicate username/email ---
         r_dup = await client.post(f"{BASE}/", json=payload1)
-        assert r_dup.status_code == status.HTTP_400_BAD_REQUEST
+        assert r_dup.status_code == status.HTTP_409_CONFLICT
+        # every unique column collides here; SQLite reports whichever index it checks first
+        assert r_dup.json()["detail"].endswith("already registered")
 
         # --- List users (requires auth) ---
         r_list = await client.get(f"{BASE}/")
@@ -113,3 +117,90 @@ async def test_user_crud(async_session):
         r_list2 = await client.get(f"{BASE}/")
         remaining = [u["id"] for u in r_list2.json()]
         assert user1.id not in remaining
+
+@pytest.mark.anyio
+async def test_delete_user_removes_selections(async_session):
+    from sqlmodel import select
+    from app.models.province_model import Province
+    from app.models.province_target_model import ProvinceTarget
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        payload = {"username": "leaver", "phone": "0811111111", "password": "x"}
+        leaver = (await client.post(f"{BASE}/", json=payload)).json()
+        provinces = [Province(name=f"DelProv{i}", category="primary", selection_count=1) for i in range(2)]
+        async_session.add_all(provinces)
+        await async_session.commit()
+        async_session.add_all([ProvinceTarget(user_id=leaver["id"], province_id=p.id) for p in provinces])
+        await async_session.commit()
+
+        assert (await client.delete(f"{BASE}/{leaver['id']}")).status_code == status.HTTP_204_NO_CONTENT
+        for prov in provinces:
+            await async_session.refresh(prov)
+        assert [p.selection_count for p in provinces] == [0, 0]
+
+        # SQLite ให้ id สูงสุดที่ถูกลบกับผู้ใช้ใหม่ได้ ต้องไม่ได้ selection ของคนเก่าไป
+        newcomer = (await client.post(f"{BASE}/", json={**payload, "username": "newcomer"})).json()
+        assert newcomer["id"] == leaver["id"]
+        left = await async_session.exec(select(ProvinceTarget).where(ProvinceTarget.user_id == newcomer["id"]))
+        assert left.all() == []
+
+@pytest.mark.anyio
+async def test_import_users_ndjson_and_csv(async_session):
+    import json
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        rows = [
+            {"username": "imp1", "phone": "0800000001", "password": "x"},
+            {"username": "imp2", "phone": "0800000002", "password": "x"},
+            {"username": "imp3", "phone": "0800000001", "password": "x"},  # phone taken
+            {"username": "imp4", "password": "x"},  # missing phone
+        ]
+        body = "\n".join(json.dumps(r) for r in rows) + "\n{not json\n"
+        r = await client.post(
+            f"{BASE}/import",
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert r.status_code == status.HTTP_200_OK
+        summary = r.json()
+        assert summary["inserted"] == 2
+        assert summary["failed"] == 3
+        assert sorted(e["line"] for e in summary["errors"]) == [3, 4, 5]
+
+        csv_body = "username,phone,email,password\nimp5,0800000005,,x\nimp6,0800000006,imp6@example.com,x\n"
+        r_csv = await client.post(
+            f"{BASE}/import",
+            content=csv_body.encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+        assert r_csv.json() == {"inserted": 2, "failed": 0, "errors": []}
+
+        names = {u["username"] for u in (await client.get(f"{BASE}/")).json()}
+        assert {"imp1", "imp2", "imp5", "imp6"} <= names
+        assert not {"imp3", "imp4"} & names
+
+        # บรรทัดที่ถูกปฏิเสธต้องเป็นบรรทัดที่ชนจริง แม้ username จะซ้ำกับบรรทัดที่ผ่าน
+        same_name = [
+            {"username": "imp7", "phone": "0800000001", "password": "x"},  # phone taken
+            {"username": "imp7", "phone": "0800000007", "password": "x"},
+        ]
+        r_pos = await client.post(
+            f"{BASE}/import",
+            content="\n".join(json.dumps(r) for r in same_name).encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert r_pos.json()["inserted"] == 1
+        assert [e["line"] for e in r_pos.json()["errors"]] == [1]
+        imp7 = [u for u in (await client.get(f"{BASE}/")).json() if u["username"] == "imp7"]
+        assert [u["phone"] for u in imp7] == ["0800000007"]
+
+@pytest.mark.anyio
+async def test_update_and_delete_missing_user(async_session):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        r_patch = await client.patch(f"{BASE}/999999", json={"phone": "0000000000"})
+        assert r_patch.status_code == status.HTTP_404_NOT_FOUND
+        r_del = await client.delete(f"{BASE}/999999")
+        assert r_del.status_code == status.HTTP_404_NOT_FOUND